@@ -0,0 +1,458 @@
+# Import required modules
+
+# This program times the slow parts of the gear programs so that changes can
+# be checked to make sure they make things faster and not slower
+# Each run is added to a history file with one json object per line and the
+# compare command shows the change between 2 runs
+
+# gearCache contains the gear generators
+# We do not have to import numpy etc. as this is done in gearCore
+from gearCache import *
+# contactPoints counts the points of contact between 2 gears
+from contactRatio import contactPoints
+import argparse
+import datetime
+import platform
+import subprocess
+import tempfile
+import json
+import time
+import sys
+
+# The gears which are generated by the generation benchmarks
+# The step is given as a fraction of the module like the gear generator
+teeth = (10, 20, 40, 80)
+steps = (0.05, 0.01)
+
+def gearParameters(z, m=1):
+    # The parameters of a standard gear used by the benchmarks
+    return cachedParameters(z, 20, m, 0.04, 1, 1.25)
+
+def timeFunction(function, repeat):
+    # Run a function several times and return the times in seconds
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return times
+
+def generationBenchmarks():
+    # profilePoints is always available but the window programs need tkinter
+    # and matplotlib so they are only timed when they can be imported
+    functions = [("profilePoints", profilePoints)]
+
+    try:
+        from gearProgram import GearGUI
+    except ImportError:
+        functions.append(("GearGUI.gearPoints", None))
+    else:
+        functions.append(("GearGUI.gearPoints",
+                          lambda parameters, step: GearGUI.gearPoints(
+                              None, parameters, step)))
+
+    try:
+        import gearGenerator
+    except ImportError:
+        functions.append(("gearGenerator.gearPoints", None))
+    else:
+        functions.append(("gearGenerator.gearPoints",
+                          gearGenerator.gearPoints))
+
+    for name, function in functions:
+        for z in teeth:
+            for step in steps:
+                parameters = gearParameters(z)
+                yield ("{} z={} step={}".format(name, z, step),
+                       None if function is None else
+                       (lambda f=function, p=parameters, s=step: f(p, s)),
+                       5)
+
+def ioBenchmarks(directory):
+    # A round trip of a gear through an xls file and a binary gear file
+    parameters = gearParameters(20)
+    points = profilePoints(parameters, 0.05).tolist()
+    fileName = os.path.join(directory, "benchmark.xls")
+    gearFile = os.path.join(directory, "benchmark.gear")
+
+    def roundTrip():
+        writeData(fileName, points, parameters)
+        readData(fileName)
+
+    def write():
+        writeData(fileName, points, parameters)
+
+    def read():
+        readData(fileName)
+
+    write()
+    yield ("writeData z=20 step=0.05", write, 5)
+    yield ("readData z=20 step=0.05", read, 5)
+    yield ("readParameters z=20 step=0.05",
+           lambda: readParameters(fileName), 20)
+    yield ("readData/writeData round trip z=20 step=0.05", roundTrip, 5)
+
+    writeData(gearFile, points, parameters)
+    yield ("writeData gear z=20 step=0.05",
+           lambda: writeData(gearFile, points, parameters), 20)
+    yield ("readData gear z=20 step=0.05", lambda: readData(gearFile), 20)
+
+    # A compact gear file is expanded when it is converted to an array
+    import gearFormat
+    toothFile = os.path.join(directory, "tooth.gear")
+    gearFormat.writeGear(toothFile, points, parameters, tooth=True,
+                         resolution=1e-6)
+    yield ("readData tooth gear z=20 step=0.05",
+           lambda: numpy.asarray(readData(toothFile)[0]), 20)
+
+def available(module):
+    # Check if an optional module can be imported
+    try:
+        __import__(module)
+    except ImportError:
+        return False
+    return True
+
+def streamBenchmarks(directory):
+    # Writing profiles with gearStream compared with the xls writer
+    # The large profile has too many points for an xls file
+    formats = ((".xls", None), (".gear", None), (".csv", None),
+               (".xlsx", "openpyxl"), (".parquet", "pyarrow"))
+
+    for z, step in ((20, 0.05), (20, 0.0005)):
+        parameters = gearParameters(z)
+        points = profilePoints(parameters, step)
+
+        for extension, module in formats:
+            if extension == ".xls" and len(points) > 65536:
+                continue
+
+            name = "writeData{} z={} points={}".format(extension, z,
+                                                       len(points))
+            if module != None and not available(module):
+                yield (name, None, 3)
+                continue
+
+            fileName = os.path.join(directory, "stream" + extension)
+            yield (name, lambda f=fileName, p=points, q=parameters:
+                   writeData(f, p, q), 3)
+
+def catalogBenchmarks(directory):
+    # Searching a catalog of 1000 gear files and updating it when nothing
+    # has changed
+    import gearCatalog
+
+    directory = os.path.join(directory, "catalog")
+    os.makedirs(directory)
+    points = numpy.zeros((1, 2))
+    for z in range(10, 110):
+        for m in numpy.linspace(0.5, 5, 10):
+            writeData(os.path.join(directory, "z{}_m{}.gear".format(z, m)),
+                      points, gearParameters(z, m))
+
+    catalog = gearCatalog.GearCatalog(directory, ":memory:")
+    catalog.update()
+
+    yield ("GearCatalog.update files=1000 unchanged", catalog.update, 5)
+    yield ("GearCatalog.find files=1000 m=2 alpha=20",
+           lambda: catalog.find(m=2, alpha=20), 20)
+
+def exportBenchmarks(directory):
+    # Exporting gears as DXF files with the outline fitted with arcs
+    import gearDxf
+
+    for z in (20, 80):
+        parameters = gearParameters(z)
+        points = profilePoints(parameters, 0.005)
+        fileName = os.path.join(directory, "export.dxf")
+        for tolerance in (0.01, 0.001):
+            yield ("writeDxf z={} points={} tolerance={}".format(
+                z, len(points), tolerance),
+                   lambda f=fileName, p=points, q=parameters, t=tolerance:
+                   gearDxf.writeDxf(f, p, q, t), 3)
+
+def indexBenchmarks():
+    # Proximity queries on a gear profile with the spatial indexes
+    import gearIndex
+
+    parameters = gearParameters(40)
+    points = profilePoints(parameters, 0.01)
+    queries = numpy.random.default_rng(0).normal(
+        points[::10], 0.05 * parameters["m"])
+    grid = gearIndex.GridIndex(points)
+    polar = gearIndex.PolarIndex(points)
+
+    yield ("GridIndex z=40 points={}".format(len(points)),
+           lambda: gearIndex.GridIndex(points), 5)
+    yield ("GridIndex.nearest queries={}".format(len(queries)),
+           lambda: grid.nearest(queries), 5)
+    yield ("GridIndex.radius queries={}".format(len(queries)),
+           lambda: grid.radius(queries, 0.1), 5)
+    yield ("PolarIndex.contains queries={}".format(len(queries)),
+           lambda: polar.contains(queries), 20)
+
+def meshBenchmarks():
+    # Calculating the contact ratio of a million pairs of gears at once
+    import gearMesh
+
+    z = numpy.random.default_rng(0).integers(8, 120, (2, 1000000))
+    r = z / 2
+    r_b = r * numpy.cos(numpy.radians(20))
+
+    yield ("transverseContactRatio pairs=1000000",
+           lambda: gearMesh.transverseContactRatio(r[0] + 1, r_b[0], z[0],
+                                                   r[1] + 1, r_b[1], 20), 3)
+
+def contactBenchmarks():
+    # The contactRatio.py sweep for a 20 and a 30 tooth gear
+    parameters1 = gearParameters(20)
+    parameters2 = gearParameters(30)
+    points1 = profilePoints(parameters1, 0.05)
+    points2 = profilePoints(parameters2, 0.05)
+    angles = numpy.linspace(0, 360, 36)
+
+    yield ("contactPoints z=20 z=30 angles=36",
+           lambda: contactPoints(points1, parameters1, points2, parameters2,
+                                 0.01, angles), 3)
+
+    import gearContact
+    angles = numpy.linspace(0, 360, 180)
+    yield ("gearContact.contactCounts z=20 z=30 angles=180",
+           lambda: gearContact.contactCounts(points1, parameters1, points2,
+                                             parameters2, 0.01, angles), 5)
+    yield ("gearContact.periodicContactCounts z=20 z=30 samples=180",
+           lambda: gearContact.periodicContactCounts(
+               points1, parameters1, points2, parameters2, 0.01, 180), 5)
+    yield ("gearContact.periodicInterference z=20 z=30 samples=180",
+           lambda: gearContact.periodicInterference(
+               points1, parameters1, points2, parameters2, 180), 5)
+
+def rotationBenchmarks():
+    # Rotating a gear with the list based function
+    points = profilePoints(gearParameters(40), 0.05)
+    x = points[:, 0].tolist()
+    y = points[:, 1].tolist()
+
+    yield ("rotatePointList z=40 step=0.05",
+           lambda: rotatePointList(x, y, 0.05, (-20, 0)), 20)
+
+    # Rotating the same gear kept in polar form
+    from gearIndex import PolarProfile
+    profile = PolarProfile(points, (-20, 0))
+
+    def rotate():
+        profile.rotate(0.05)
+        return profile.cartesian()
+
+    yield ("PolarProfile.rotate z=40 step=0.05", rotate, 20)
+
+def animationBenchmarks():
+    # A single frame of GearGUI.animate drawn without a window
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from gearProgram import GearGUI
+    except ImportError:
+        yield ("GearGUI.animate frame z=20 z=30", None, 20)
+        return
+
+    class Switch(object):
+        # Stands in for the tkinter variable which turns the animation on
+        def get(self):
+            return True
+
+    class Window(object):
+        # The parts of the window used by GearGUI.animate
+        pass
+
+    from gearIndex import PolarProfile
+
+    window = Window()
+    window.animationOn = Switch()
+    window.parameters1 = gearParameters(20)
+    window.parameters2 = gearParameters(30)
+    window.lines = []
+    window.points = []
+
+    figure = Figure()
+    canvas = FigureCanvasAgg(figure)
+    axis = figure.add_subplot(111)
+    points1 = profilePoints(window.parameters1, 0.05)
+    points2 = profilePoints(window.parameters2, 0.05)
+    points1 = points1 - (window.parameters1["r"], 0)
+    points2 = points2 + (window.parameters2["r"], 0)
+    window.gear1, = axis.plot(points1[:, 0], points1[:, 1], "r")
+    window.gear2, = axis.plot(points2[:, 0], points2[:, 1], "r")
+    window.profile1 = PolarProfile(points1, (-window.parameters1["r"], 0))
+    window.profile2 = PolarProfile(points2, (window.parameters2["r"], 0))
+
+    def frame():
+        GearGUI.animate(window)
+        canvas.draw()
+
+    yield ("GearGUI.animate frame z=20 z=30", frame, 20)
+
+def allBenchmarks(directory):
+    # Every benchmark as (name, function, repeat)
+    # The function is None if the benchmark cannot be run
+    yield from generationBenchmarks()
+    yield from ioBenchmarks(directory)
+    yield from streamBenchmarks(directory)
+    yield from catalogBenchmarks(directory)
+    yield from exportBenchmarks(directory)
+    yield from indexBenchmarks()
+    yield from meshBenchmarks()
+    yield from contactBenchmarks()
+    yield from rotationBenchmarks()
+    yield from animationBenchmarks()
+
+def gitCommit():
+    # The commit being benchmarked if this is a git repository
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                                cwd=os.path.dirname(os.path.abspath(__file__)),
+                                stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL,
+                                universal_newlines=True)
+    except OSError:
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip()
+
+def runBenchmarks(pattern=None, repeat=None):
+    # Run the benchmarks and return a record for the history file
+    results = {}
+    skipped = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, function, count in allBenchmarks(directory):
+            if pattern != None and pattern not in name:
+                continue
+            if function is None:
+                skipped.append(name)
+                print("{:<50} unavailable".format(name))
+                continue
+
+            # Run the function once first so the timings do not include
+            # anything which is only done the first time
+            function()
+            times = timeFunction(function, repeat or count)
+            results[name] = {"min": min(times),
+                             "median": float(numpy.median(times)),
+                             "repeat": len(times)}
+            print("{:<50} {:>10.3f} ms".format(name, 1000 * min(times)))
+
+    return {"date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "commit": gitCommit(),
+            "python": platform.python_version(),
+            "numpy": numpy.__version__,
+            "results": results,
+            "skipped": skipped}
+
+def readHistory(fileName):
+    # Read every run from the history file
+    history = []
+    with open(fileName) as f:
+        for line in f:
+            if line.strip() != "":
+                history.append(json.loads(line))
+    return history
+
+def appendHistory(fileName, record):
+    with open(fileName, "a") as f:
+        f.write(json.dumps(record, sort_keys=True) + "\n")
+
+def compareRuns(baseline, current, threshold):
+    # Compare the fastest times of 2 runs
+    # Returns a list of (name, baseline, current, ratio, regression)
+    rows = []
+    for name in sorted(current["results"].keys()):
+        if name not in baseline["results"]:
+            continue
+        before = baseline["results"][name]["min"]
+        after = current["results"][name]["min"]
+        ratio = after / before
+        rows.append((name, before, after, ratio, ratio > 1 + threshold))
+    return rows
+
+def run(arguments):
+    record = runBenchmarks(arguments.filter, arguments.repeat)
+    appendHistory(arguments.history, record)
+    print("Saved the results to {}".format(arguments.history))
+    return 0
+
+def compare(arguments):
+    history = readHistory(arguments.history)
+    if len(history) < 2:
+        sys.stderr.write("At least 2 runs are needed to compare.\n")
+        return 1
+
+    baseline = history[arguments.baseline]
+    current = history[arguments.current]
+    rows = compareRuns(baseline, current, arguments.threshold)
+
+    print("Comparing {} ({}) with {} ({})".format(
+        current["date"], current["commit"], baseline["date"],
+        baseline["commit"]))
+    regressions = 0
+    for name, before, after, ratio, regression in rows:
+        if regression:
+            regressions += 1
+        print("{:<50} {:>10.3f} {:>10.3f} ms {:>7.2f}x{}".format(
+            name, 1000 * before, 1000 * after, ratio,
+            "  REGRESSION" if regression else ""))
+
+    print("{} regressions beyond {:.0%}".format(regressions,
+                                               arguments.threshold))
+    return int(regressions != 0)
+
+def listBenchmarks(arguments):
+    with tempfile.TemporaryDirectory() as directory:
+        for name, function, count in allBenchmarks(directory):
+            print(name if function != None else name + " (unavailable)")
+    return 0
+
+def createParser():
+    parser = argparse.ArgumentParser(
+        prog="benchmark", description="Time the gear programs and compare "
+        "the results with earlier runs.")
+    parser.add_argument("--history", default="benchmarkHistory.jsonl",
+                        help="the file containing the results of every run")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    command = commands.add_parser("run", help="run the benchmarks")
+    command.add_argument("--filter",
+                         help="only run the benchmarks containing this text")
+    command.add_argument("--repeat", type=int,
+                         help="the number of times to time each benchmark")
+    command.set_defaults(function=run)
+
+    command = commands.add_parser("compare", help="compare 2 runs")
+    command.add_argument("--baseline", type=int, default=-2,
+                         help="the index of the run to compare with (the "
+                         "second to last run by default)")
+    command.add_argument("--current", type=int, default=-1,
+                         help="the index of the run to compare (the last "
+                         "run by default)")
+    command.add_argument("--threshold", type=float, default=0.1,
+                         help="the fraction a benchmark can slow down by "
+                         "before it is a regression")
+    command.set_defaults(function=compare)
+
+    command = commands.add_parser("list", help="list the benchmarks")
+    command.set_defaults(function=listBenchmarks)
+
+    return parser
+
+def main(argv=None):
+    arguments = createParser().parse_args(argv)
+    return arguments.function(arguments)
+
+# If this program is being run directly this code will be executed
+# If this program is being imported this code will not be executed
+if __name__ == "__main__":
+    sys.exit(main())
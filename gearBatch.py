@@ -0,0 +1,167 @@
+# Import required modules
+
+# gearCache contains the cached gear generators
+# We do not have to import numpy etc. as this is done in gearCore
+from gearCache import *
+# itertools is used to create every combination of the parameters
+import itertools
+# json, zipfile and traceback are used to save the results and the errors
+import json
+import zipfile
+import traceback
+import sys
+
+# The names of the values which describe a gear, in order
+gearKeys = ("z", "alpha", "m", "backlash", "addendum", "dedendum")
+
+def parameterGrid(z, alpha=20, m=1, backlash=0.04, addendum=1, dedendum=1.25):
+    # Create a list of every combination of the gear values
+    # Each argument can be a single value or a list (or range) of values
+    # numpy values are converted to python values so they can be saved
+    values = []
+    for value in (z, alpha, m, backlash, addendum, dedendum):
+        if numpy.ndim(value) == 0:
+            value = [value]
+        values.append([v.item() if hasattr(v, "item") else v for v in value])
+
+    return [dict(zip(gearKeys, item)) for item in itertools.product(*values)]
+
+def gearName(item):
+    # The name of a gear in the output file
+    return "z{z}_alpha{alpha}_m{m}_backlash{backlash}_addendum{addendum}" \
+           "_dedendum{dedendum}".format(**item)
+
+def checkItem(item):
+    # Check that a gear can be generated from a dictionary of the gear values
+    # The same limit is used as the gear generator window
+    if item["z"] < 4:
+        raise ValueError("The gear cannot be generated because it has too "
+                         "few teeth.")
+
+def generateItem(item, step=None, tolerance=None):
+    # Generate a single gear from a dictionary of the gear values
+    # This is run in the worker processes so any error is returned
+    # instead of being raised
+    try:
+        checkItem(item)
+        values = [item[key] for key in gearKeys]
+        parameters = cachedParameters(*values)
+
+        # Use the same step as the gear generator window if none is given
+        if step is None and tolerance is None:
+            itemStep = 0.05 * item["m"]
+        else:
+            itemStep = step
+
+        points = cachedPoints(*values, step=itemStep, tolerance=tolerance)
+
+        return (item, points, parameters, None)
+    except Exception:
+        return (item, None, None, traceback.format_exc())
+
+def jsonValue(value):
+    # Convert a value which json cannot save, such as a numpy number
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return repr(value)
+
+def printProgress(done, total):
+    # The default progress report
+    sys.stdout.write("\rGenerated {} of {} gears".format(done, total))
+    if done == total:
+        sys.stdout.write("\n")
+    sys.stdout.flush()
+
+class BatchStore(object):
+    # A single file containing the output of a batch
+    # It is a zip file which numpy.load can open like an npz file, with the
+    # points of each gear saved as <name>.npy and the parameters and errors
+    # saved as json when the store is closed
+
+    def __init__(self, fileName, compress=False):
+        if compress:
+            compression = zipfile.ZIP_DEFLATED
+        else:
+            compression = zipfile.ZIP_STORED
+
+        self.fileName = fileName
+        self.file = zipfile.ZipFile(fileName, "w", compression,
+                                    allowZip64=True)
+        self.parameters = {}
+        self.errors = []
+
+    def add(self, name, points, parameters):
+        # Write the points to the file straight away to keep memory low
+        with self.file.open(name + ".npy", "w", force_zip64=True) as f:
+            numpy.lib.format.write_array(f, numpy.asarray(points),
+                                         allow_pickle=False)
+        self.parameters[name] = parameters
+
+    def addError(self, item, error):
+        self.errors.append({"item": item, "error": error})
+
+    def close(self):
+        # The zip file is always closed so the points which have been saved
+        # can still be read if the parameters or errors cannot be written
+        try:
+            self.file.writestr("parameters.json",
+                               json.dumps(self.parameters, default=jsonValue))
+            self.file.writestr("errors.json",
+                               json.dumps(self.errors, default=jsonValue))
+        finally:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+def readBatch(fileName):
+    # Open the output of a batch
+    # The points are loaded from the npz file when they are first used
+    data = numpy.load(fileName)
+    parameters = json.loads(data["parameters.json"])
+    errors = json.loads(data["errors.json"])
+
+    return data, parameters, errors
+
+def generateBatch(items, fileName, step=None, tolerance=None, workers=None,
+                  progress=printProgress, chunksize=8, compress=False):
+    # Generate a list of gears across all of the cores of the computer
+    # items is a list of dictionaries such as those made by parameterGrid
+    # The gears are saved to a single file as they are generated and any
+    # gear which fails is recorded in the errors instead of stopping the batch
+    # It returns the number of gears generated and the list of errors
+    # concurrent.futures provides the process pool to use all of the cores
+    # It is imported here as it is not needed to read a batch
+    from concurrent.futures import ProcessPoolExecutor
+
+    total = len(items)
+    done = 0
+
+    with BatchStore(fileName, compress) as store:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(generateItem, items,
+                                   itertools.repeat(step),
+                                   itertools.repeat(tolerance),
+                                   chunksize=chunksize)
+
+            for item, points, parameters, error in results:
+                if error is None:
+                    store.add(gearName(item), points, parameters)
+                else:
+                    store.addError(item, error)
+
+                done += 1
+                if progress != None:
+                    progress(done, total)
+
+        errors = store.errors
+
+    return (total - len(errors), errors)
+
+# If this program is being run directly this code will be executed
+# If this program is being imported this code will not be executed
+if __name__ == "__main__":
+    print("This module is intended to be imported and not run directly.")
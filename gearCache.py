@@ -0,0 +1,276 @@
+# Import required modules
+
+# gearProfile contains the functions which generate the gear points
+# We do not have to import numpy etc. as this is done in gearCore
+from gearProfile import *
+# OrderedDict keeps the cached profiles in the order they were last used
+from collections import OrderedDict
+# functools provides the cache for the gear parameters
+import functools
+# hashlib is used to create the file names for the disk cache
+import hashlib
+# threading is used to protect the document cache as files can be read on
+# background threads
+import threading
+
+# The version is part of every key so that profiles saved to disk by an older
+# version of the generator are not used after the generator changes
+cacheVersion = 2
+
+class ProfileCache(object):
+    # A cache of generated gear profiles
+    # The most recently used profiles are kept in memory and if a directory
+    # is given the profiles are also saved to disk as npy files
+
+    def __init__(self, size=128, directory=None, maxBytes=256 * 2**20):
+        # The largest number of profiles to keep in memory
+        self.size = size
+        # The directory of the disk cache and its largest size in bytes
+        self.directory = directory
+        self.maxBytes = maxBytes
+
+        self.memory = OrderedDict()
+        self.stats = {"hits": 0, "diskHits": 0, "misses": 0,
+                      "evictions": 0, "diskEvictions": 0}
+        # The memory cache can be used by several threads
+        self.lock = threading.RLock()
+
+        # Find the size of the profiles which are already on disk
+        self.diskBytes = 0
+        if self.directory != None:
+            os.makedirs(self.directory, exist_ok=True)
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".npy"):
+                    self.diskBytes += entry.stat().st_size
+
+    def fileName(self, key):
+        # The disk cache file name is a hash of the key
+        name = hashlib.sha1(repr((cacheVersion, key)).encode()).hexdigest()
+        return os.path.join(self.directory, name + ".npy")
+
+    def get(self, key):
+        # Return the cached profile for the key or None if it is not cached
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.stats["hits"] += 1
+                return self.memory[key]
+
+        if self.directory != None:
+            fileName = self.fileName(key)
+            try:
+                points = numpy.load(fileName)
+            except (OSError, ValueError):
+                pass
+            else:
+                # Mark the file as recently used so it is evicted last
+                os.utime(fileName)
+                self.stats["diskHits"] += 1
+                self.remember(key, points)
+                return points
+
+        self.stats["misses"] += 1
+        return None
+
+    def put(self, key, points):
+        # Add a profile to the cache
+        self.remember(key, points)
+
+        if self.directory != None:
+            # Write to a temporary file first so that other processes
+            # never see a partly written profile
+            fileName = self.fileName(key)
+            temporary = "{}.{}.tmp".format(fileName, os.getpid())
+            with open(temporary, "wb") as f:
+                numpy.save(f, points)
+            try:
+                self.diskBytes -= os.path.getsize(fileName)
+            except OSError:
+                pass
+            os.replace(temporary, fileName)
+            self.diskBytes += os.path.getsize(fileName)
+
+            if self.diskBytes > self.maxBytes:
+                self.evict()
+
+        return points
+
+    def remember(self, key, points):
+        # Add a profile to the memory cache
+        # The arrays are shared so they are made read only
+        points.setflags(write=False)
+        with self.lock:
+            self.memory[key] = points
+            self.memory.move_to_end(key)
+
+            while len(self.memory) > self.size:
+                self.memory.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def evict(self):
+        # Remove the least recently used files until the disk cache fits
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".npy"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        files.sort()
+
+        self.diskBytes = sum(f[1] for f in files)
+        for mtime, size, path in files:
+            if self.diskBytes <= self.maxBytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self.diskBytes -= size
+            self.stats["diskEvictions"] += 1
+
+    def generate(self, key, function, *args, **kwargs):
+        # Return the cached profile or generate it and add it to the cache
+        points = self.get(key)
+        if points is None:
+            points = self.put(key, function(*args, **kwargs))
+        return points
+
+    def clear(self):
+        # Empty the memory cache
+        with self.lock:
+            self.memory.clear()
+
+@functools.lru_cache(maxsize=1024)
+def parameterItems(z, alpha, m, backlash, addendum, dedendum):
+    # The parameters are cached as a tuple so they cannot be changed
+    return tuple(calculateParameters(z, alpha, m, backlash, addendum,
+                                     dedendum).items())
+
+def cachedParameters(z, alpha, m, backlash, addendum, dedendum):
+    # A cached version of calculateParameters
+    # A new dictionary is returned so the caller can change it
+    return dict(parameterItems(z, alpha, m, backlash, addendum, dedendum))
+
+# The cache used by cachedPoints
+# Set profileCache.directory (or replace it) to use a disk cache
+profileCache = ProfileCache()
+
+def normalise(value, m):
+    # Divide a length by the module and round it so it can be used in a key
+    if value is None:
+        return None
+    return round(value / m, 12)
+
+def unitPoints(z, alpha, backlash, addendum, dedendum, step=None,
+               tolerance=None, cache=None):
+    # A cached profile for a gear with a module of 1
+    # step and tolerance are given for the unit module gear
+    # The array returned is shared with the cache and is read only
+    if cache is None:
+        cache = profileCache
+
+    key = (z, alpha, backlash, addendum, dedendum, step, tolerance)
+    parameters = cachedParameters(z, alpha, 1, backlash, addendum, dedendum)
+
+    if tolerance != None:
+        return cache.generate(key, lambda: adaptivePoints(parameters,
+                                                          tolerance)[0])
+    return cache.generate(key, profilePoints, parameters, step)
+
+def cachedPoints(z, alpha, m, backlash, addendum, dedendum, step=None,
+                 tolerance=None, cache=None):
+    # A cached version of profilePoints (or adaptivePoints with a tolerance)
+    # Every length on a gear is proportional to the module so the profile is
+    # generated for a module of 1 and then scaled, which means gears which
+    # only differ by their module share a single cached profile
+    points = unitPoints(z, alpha, backlash, addendum, dedendum,
+                        normalise(step, m), normalise(tolerance, m), cache)
+    return numpy.multiply(points, m)
+
+class DocumentCache(object):
+    # A cache of the gear files which have been opened
+    # Each file is kept with its modification time and size and is only read
+    # again if either of them changes, so redrawing a gear does not read it
+
+    def __init__(self, size=8):
+        # The largest number of files to keep
+        self.size = size
+
+        self.documents = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self.lock = threading.RLock()
+
+    def key(self, fileName):
+        # The file is identified by its path, modification time and size
+        stat = os.stat(fileName)
+        return (os.path.abspath(fileName), stat.st_mtime_ns, stat.st_size)
+
+    def find(self, fileName):
+        # Return the cached entry for a file and its key
+        # Entries for an older version of the file are removed
+        key = self.key(fileName)
+        with self.lock:
+            entry = self.documents.get(key[0])
+            if entry != None and entry[0] == key:
+                self.documents.move_to_end(key[0])
+                return entry, key
+            if entry != None:
+                del self.documents[key[0]]
+        return None, key
+
+    def store(self, key, points, parameters):
+        with self.lock:
+            self.documents[key[0]] = (key, points, parameters)
+            self.documents.move_to_end(key[0])
+
+            while len(self.documents) > self.size:
+                self.documents.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def cached(self, fileName, points=True):
+        # Check if a file (or only its parameters) can be read from the
+        # cache without reading the file
+        try:
+            entry, key = self.find(fileName)
+        except OSError:
+            return False
+        return entry != None and (not points or entry[1] is not None)
+
+    def read(self, fileName):
+        # A cached version of readData
+        # The points are shared so they are read only and a copy of the
+        # parameters is returned so the caller can change it
+        entry, key = self.find(fileName)
+        if entry is None or entry[1] is None:
+            self.stats["misses"] += 1
+            points, parameters = readData(fileName)
+            points = numpy.array(points, dtype=float)
+            points.setflags(write=False)
+            self.store(key, points, parameters)
+        else:
+            self.stats["hits"] += 1
+            points, parameters = entry[1], entry[2]
+
+        return points, dict(parameters)
+
+    def parameters(self, fileName):
+        # A cached version of readParameters
+        # Only the parameters are read if the points have not been loaded
+        entry, key = self.find(fileName)
+        if entry is None:
+            self.stats["misses"] += 1
+            parameters = readParameters(fileName)
+            self.store(key, None, parameters)
+        else:
+            self.stats["hits"] += 1
+            parameters = entry[2]
+
+        return dict(parameters)
+
+    def clear(self):
+        with self.lock:
+            self.documents.clear()
+
+# If this program is being run directly this code will be executed
+# If this program is being imported this code will not be executed
+if __name__ == "__main__":
+    print("This module is intended to be imported and not run directly.")
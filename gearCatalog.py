@@ -0,0 +1,209 @@
+# Import required modules
+
+# This module keeps an index of the gear files in a directory in an SQLite
+# database so that gears can be found by their parameters without opening
+# every file
+# Each file is recorded with its modification time, size and a hash of its
+# contents, and updating the catalog only reads the files which have changed
+
+# This imports the core functions for working with gears
+# We do not have to import numpy etc. as this is done in gearCore
+from gearCore import *
+# sqlite3 stores the catalog and hashlib creates the hashes of the files
+import sqlite3
+import hashlib
+import json
+
+# The extensions of the files which are added to the catalog
+gearExtensions = (".xls", ".gear", ".csv", ".xlsx", ".parquet")
+
+# The name of the catalog file which is kept in the directory it indexes
+catalogName = "gearCatalog.sqlite"
+
+# The parameters which are stored in their own columns so they can be
+# searched, the others are only kept in the json of the parameters column
+catalogColumns = ("z", "alpha", "m", "d", "d_a")
+
+# Values which are within this distance are treated as equal in queries
+tolerance = 1e-9
+
+def fileHash(fileName, blockSize=2**20):
+    # The sha1 hash of the contents of a file
+    sha1 = hashlib.sha1()
+    with open(fileName, "rb") as f:
+        for block in iter(lambda: f.read(blockSize), b""):
+            sha1.update(block)
+    return sha1.hexdigest()
+
+class GearCatalog(object):
+    # The catalog of the gear files in a directory
+
+    def __init__(self, directory=None, fileName=None):
+        # The data directory is used by default and the catalog is saved in
+        # the directory unless another file name (or ":memory:") is given
+        if directory is None:
+            directory = os.path.join(os.getcwd(), "data")
+        if fileName is None:
+            fileName = os.path.join(directory, catalogName)
+
+        self.directory = directory
+        self.connection = sqlite3.connect(fileName)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS gears (
+                path TEXT PRIMARY KEY,
+                mtime REAL NOT NULL,
+                size INTEGER NOT NULL,
+                hash TEXT NOT NULL,
+                z REAL, alpha REAL, m REAL, d REAL, d_a REAL,
+                parameters TEXT NOT NULL);
+            CREATE INDEX IF NOT EXISTS gearsModule ON gears (m, alpha, z);
+            CREATE INDEX IF NOT EXISTS gearsTeeth ON gears (z);
+            CREATE INDEX IF NOT EXISTS gearsDiameter ON gears (d);
+            """)
+
+    def scan(self):
+        # Find the gear files in the directory with their modification times
+        # and sizes
+        files = {}
+        for entry in os.scandir(self.directory):
+            if (entry.is_file()
+                and os.path.splitext(entry.name)[1].lower() in gearExtensions):
+                stat = entry.stat()
+                files[entry.path] = (stat.st_mtime, stat.st_size)
+        return files
+
+    def update(self):
+        # Bring the catalog up to date with the directory
+        # Only new files and files whose modification time or size has
+        # changed are read, and a file whose contents are unchanged (the hash
+        # is the same) is not read again
+        # Returns the number of files added, updated, removed and unchanged
+        counts = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0,
+                  "failed": 0}
+
+        files = self.scan()
+        known = {row["path"]: row for row in self.connection.execute(
+            "SELECT path, mtime, size, hash FROM gears")}
+
+        with self.connection:
+            for path in known.keys() - files.keys():
+                self.connection.execute("DELETE FROM gears WHERE path = ?",
+                                        (path,))
+                counts["removed"] += 1
+
+            for path, (mtime, size) in files.items():
+                row = known.get(path)
+                if (row != None and row["mtime"] == mtime
+                    and row["size"] == size):
+                    counts["unchanged"] += 1
+                    continue
+
+                digest = fileHash(path)
+                if row != None and row["hash"] == digest:
+                    # The file has been touched but not changed
+                    self.connection.execute(
+                        "UPDATE gears SET mtime = ?, size = ? WHERE path = ?",
+                        (mtime, size, path))
+                    counts["unchanged"] += 1
+                    continue
+
+                try:
+                    parameters = readParameters(path)
+                except Exception:
+                    parameters = {}
+                if any(key not in parameters for key in catalogColumns):
+                    # Files which are not gears are left out of the catalog
+                    if row != None:
+                        self.connection.execute(
+                            "DELETE FROM gears WHERE path = ?", (path,))
+                    counts["failed"] += 1
+                    continue
+
+                values = [parameters.get(key) for key in catalogColumns]
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO gears VALUES "
+                    "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [path, mtime, size, digest] + values
+                    + [json.dumps({key: numpy.asarray(value).item()
+                                   for key, value in parameters.items()})])
+                if row is None:
+                    counts["added"] += 1
+                else:
+                    counts["updated"] += 1
+
+        return counts
+
+    def find(self, m=None, alpha=None, z=None, minZ=None, maxZ=None,
+             minD=None, maxD=None, extensions=None):
+        # Find the gears with the given parameters using the indexes
+        # Returns a list of dictionaries of the path and parameters of each
+        # gear in order of the path
+        conditions = []
+        values = []
+        for column, value in (("m", m), ("alpha", alpha), ("z", z)):
+            if value != None:
+                conditions.append("{} BETWEEN ? AND ?".format(column))
+                values += [value - tolerance, value + tolerance]
+        for condition, value in (("z >= ?", minZ), ("z <= ?", maxZ),
+                                 ("d >= ?", minD), ("d <= ?", maxD)):
+            if value != None:
+                conditions.append(condition)
+                values.append(value)
+
+        query = "SELECT path, parameters FROM gears"
+        if len(conditions) != 0:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY path"
+
+        gears = []
+        for row in self.connection.execute(query, values):
+            if (extensions is None or os.path.splitext(row["path"])[1].lower()
+                in extensions):
+                gears.append({"path": row["path"],
+                              "parameters": json.loads(row["parameters"])})
+        return gears
+
+    def meshing(self, parameters):
+        # Find the gears which can mesh with a gear, which are the gears with
+        # the same module and pressure angle
+        return self.find(m=parameters["m"], alpha=parameters["alpha"])
+
+    def paths(self, extensions=None):
+        # The paths of every gear in the catalog
+        return [gear["path"] for gear in self.find(extensions=extensions)]
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+def openCatalog(directory=None):
+    # Open the catalog of a directory and update it
+    # If the catalog cannot be saved in the directory it is kept in memory
+    try:
+        catalog = GearCatalog(directory)
+    except sqlite3.OperationalError:
+        catalog = GearCatalog(directory, ":memory:")
+    catalog.update()
+    return catalog
+
+def listGears(directory=None, extensions=gearExtensions):
+    # Create a list of the gear files in a directory using its catalog
+    # Like listXls the list contains None if there are no files
+    with openCatalog(directory) as catalog:
+        files = catalog.paths(extensions)
+
+    if len(files) == 0:
+        files.append(None)
+
+    return files
+
+# If this program is being run directly this code will be executed
+# If this program is being imported this code will not be executed
+if __name__ == "__main__":
+    print("This module is intended to be imported and not run directly.")
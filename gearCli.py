@@ -0,0 +1,394 @@
+# Import required modules
+
+# This is a command line interface to the gear tools which does not need a
+# display, so it never imports tkinter, matplotlib or vpython
+
+# gearCache contains the cached gear generators
+# We do not have to import numpy etc. as this is done in gearCore
+from gearCache import *
+# argparse reads the arguments from the command line
+import argparse
+import itertools
+import sys
+
+def saveGear(fileName, points, parameters, tooth=False, resolution=None):
+    # Save a gear in the format given by the file extension
+    # writeData chooses the format, and csv, xlsx and parquet files are
+    # written in chunks so they can hold profiles with millions of points
+    # tooth and resolution save a compact binary gear file
+    extension = os.path.splitext(fileName)[1].lower()
+
+    if extension == ".gear" and (tooth or resolution != None):
+        import gearFormat
+        gearFormat.writeGear(fileName, points, parameters, tooth=tooth,
+                             resolution=resolution)
+    elif extension in (".xls", ".gear", ".csv", ".xlsx", ".parquet"):
+        writeData(fileName, points, parameters)
+    elif extension == ".txt":
+        numpy.savetxt(fileName, points, delimiter=",", header="x,y",
+                      comments="")
+    else:
+        raise ValueError("Unknown file type {}".format(extension))
+
+def generate(arguments):
+    # Generate one gear, or a batch of gears if several values are given
+    items = [dict(zip(("z", "alpha", "m", "backlash", "addendum",
+                       "dedendum"), item))
+             for item in itertools.product(arguments.z, arguments.alpha,
+                                           arguments.m, arguments.backlash,
+                                           arguments.addendum,
+                                           arguments.dedendum)]
+    for item in items:
+        # The backlash is entered as a percentage like the gear generator
+        item["backlash"] /= 100
+
+    # The batch module is only imported when it is needed
+    import gearBatch
+
+    if len(items) > 1:
+        # A batch is saved as a table of gears, which has no compact form
+        if arguments.tooth or arguments.resolution != None:
+            sys.stderr.write("--tooth and --resolution can only be used when "
+                             "one gear is generated.\n")
+            return 1
+
+        count, errors = gearBatch.generateBatch(
+            items, arguments.output, step=arguments.step,
+            tolerance=arguments.tolerance, workers=arguments.workers)
+        for error in errors:
+            sys.stderr.write("{}\n{}".format(error["item"], error["error"]))
+        print("Saved {} gears to {}".format(count, arguments.output))
+
+        return int(len(errors) != 0)
+
+    item = items[0]
+    try:
+        gearBatch.checkItem(item)
+    except ValueError as error:
+        sys.stderr.write("{}\n".format(error))
+        return 1
+
+    values = [item[key] for key in ("z", "alpha", "m", "backlash",
+                                    "addendum", "dedendum")]
+    if arguments.step is None and arguments.tolerance is None:
+        step = 0.05 * item["m"]
+    else:
+        step = arguments.step
+
+    parameters = cachedParameters(*values)
+    points = cachedPoints(*values, step=step, tolerance=arguments.tolerance)
+    saveGear(arguments.output, points, parameters, arguments.tooth,
+             arguments.resolution)
+    print("Saved {} points to {}".format(len(points), arguments.output))
+
+    return 0
+
+def inspect(arguments):
+    # Show the parameters and the size of a gear file
+    points, parameters = readData(arguments.file)
+    points = numpy.asarray(points, dtype=float)
+
+    for key in parameters.keys():
+        print("{:>6}: {}".format(key, parameters[key]))
+    print("{:>6}: {}".format("points", len(points)))
+    if len(points) != 0:
+        r = numpy.hypot(points[:, 0], points[:, 1])
+        print("{:>6}: {:.6f} to {:.6f}".format("radius", r.min(), r.max()))
+
+    return 0
+
+def contactRatio(arguments):
+    # Count the points of contact between 2 gears
+    # contactRatio is only imported when it is needed
+    from contactRatio import contactPoints
+    from gearMesh import meshGeometry
+    import gearContact
+
+    # Check the gears can mesh before loading their points
+    parameters1 = readParameters(arguments.gear1)
+    parameters2 = readParameters(arguments.gear2)
+
+    if (parameters1["alpha"] != parameters2["alpha"]
+        or parameters1["m"] != parameters2["m"]):
+        sys.stderr.write("In order for 2 gears to mesh they must have the "
+                         "same module and pressure angle.\n")
+        return 1
+
+    # The contact ratio is calculated from the radii of the gears and the
+    # sampled count of contact points below is a check of it
+    geometry = meshGeometry(parameters1, parameters2)
+    print("Contact ratio: {:.4f}".format(geometry["epsilon_alpha"]))
+    print("Length of path of contact: {:.4f} mm (approach {:.4f} mm, "
+          "recess {:.4f} mm)".format(geometry["g_alpha"], geometry["g_f"],
+                                     geometry["g_a"]))
+    if geometry["interference"]:
+        print("The tips of the gears reach inside the base circles, so the "
+              "gears interfere.")
+
+    points1 = readData(arguments.gear1)[0]
+    points2 = readData(arguments.gear2)[0]
+
+    if arguments.full:
+        angles = numpy.linspace(0, 360, arguments.angles)
+        counts = contactPoints(points1, parameters1, points2, parameters2,
+                               arguments.percentage / 100, angles)
+        depths = gearContact.interferenceDepths(points1, parameters1,
+                                                points2, parameters2, angles)
+    else:
+        # The meshing repeats every tooth so only one pitch is sampled
+        counts = gearContact.periodicContactCounts(
+            points1, parameters1, points2, parameters2,
+            arguments.percentage / 100, arguments.angles).values
+        depths = gearContact.periodicInterference(
+            points1, parameters1, points2, parameters2,
+            arguments.angles).values
+
+    print("Average number of contact points: {}".format(numpy.mean(counts)))
+    print("Minimum number of contact points: {}".format(min(counts)))
+    print("Maximum number of contact points: {}".format(max(counts)))
+    # A depth of 0 or less means the gears only touch or do not reach each
+    # other at any angle
+    overlap = max(depths)
+    if overlap > 0:
+        print("Largest overlap of the gears: {:.6f} mm".format(overlap))
+    else:
+        print("Largest overlap of the gears: no overlap")
+
+    return 0
+
+def export(arguments):
+    # Convert a gear file to another format
+    points, parameters = readData(arguments.file)
+    saveGear(arguments.output, numpy.asarray(points, dtype=float), parameters)
+    print("Exported {} to {}".format(arguments.file, arguments.output))
+
+    return 0
+
+def dxf(arguments):
+    # Export gear files as DXF files fitted with arcs and lines
+    # Several files are exported in parallel by separate processes
+    # gearDxf is only imported when it is needed
+    import gearDxf
+
+    if len(arguments.files) == 1:
+        results = [gearDxf.exportItem(arguments.files[0], arguments.output,
+                                      arguments.tolerance,
+                                      arguments.thickness)]
+    else:
+        results = gearDxf.exportBatch(arguments.files, arguments.output,
+                                      arguments.tolerance,
+                                      arguments.thickness,
+                                      workers=arguments.workers)
+
+    failed = 0
+    for item, fileName, count, error, text in results:
+        if text != None:
+            sys.stderr.write("{}\n{}".format(item, text))
+            failed += 1
+        else:
+            print("Exported {} to {} as {} arcs and lines within {:.4g} mm"
+                  .format(item, fileName, count, error))
+
+    return int(failed != 0)
+
+def vector(arguments):
+    # Export gear files, or every gear in a catalog, as SVG or PDF outlines
+    # gearVector is only imported when it is needed
+    import gearVector
+
+    extension = "." + arguments.format
+    if len(arguments.files) == 0:
+        results = gearVector.exportCatalog(
+            arguments.output, arguments.catalog, extension,
+            workers=arguments.workers, m=arguments.m, alpha=arguments.alpha,
+            z=arguments.z)
+    else:
+        results = gearVector.exportBatch(arguments.files, arguments.output,
+                                         extension,
+                                         workers=arguments.workers)
+
+    failed = 0
+    for fileName, output, text in results:
+        if text != None:
+            sys.stderr.write("{}\n{}".format(fileName, text))
+            failed += 1
+    print("Exported {} gears to {}".format(len(results) - failed,
+                                           arguments.output))
+
+    return int(failed != 0)
+
+def convert(arguments):
+    # Convert xls gear files to binary gear files
+    # gearFormat is only imported when it is needed
+    import gearFormat
+
+    if arguments.float32:
+        dtype = "<f4"
+    else:
+        dtype = "<f8"
+
+    for fileName in arguments.files:
+        output = gearFormat.convertXls(fileName, dtype=dtype,
+                                       tooth=arguments.tooth,
+                                       resolution=arguments.resolution)
+        print("Converted {} to {}".format(fileName, output))
+
+    return 0
+
+def catalog(arguments):
+    # Update the catalog of a directory and list the gears which match
+    # gearCatalog is only imported when it is needed
+    import gearCatalog
+
+    with gearCatalog.openCatalog(arguments.directory) as gears:
+        matches = gears.find(m=arguments.m, alpha=arguments.alpha,
+                             z=arguments.z, minZ=arguments.min_z,
+                             maxZ=arguments.max_z, minD=arguments.min_d,
+                             maxD=arguments.max_d)
+
+    for gear in matches:
+        parameters = gear["parameters"]
+        print("{}  z={} alpha={} m={} d={}".format(
+            gear["path"], parameters.get("z"), parameters.get("alpha"),
+            parameters.get("m"), parameters.get("d")))
+    print("{} gears found".format(len(matches)))
+
+    return 0
+
+def addCompactArguments(command):
+    # The options for compact binary gear files
+    command.add_argument("--tooth", action="store_true",
+                         help="only save the first tooth in a gear file")
+    command.add_argument("--resolution", type=float,
+                         help="save the points of a gear file as integer "
+                         "differences rounded to this many mm")
+
+def createParser():
+    # Create the parser for the command line arguments
+    parser = argparse.ArgumentParser(
+        prog="gearCli", description="Generate and analyse gears without a "
+        "display.")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    command = commands.add_parser("generate", help="generate gears")
+    command.add_argument("output", help="the file to save to, an npz file "
+                         "is used if several gears are generated")
+    command.add_argument("--z", type=int, nargs="+", required=True,
+                         help="the number of teeth")
+    command.add_argument("--alpha", type=float, nargs="+", default=[20],
+                         help="the pressure angle in degrees")
+    command.add_argument("--m", type=float, nargs="+", default=[1],
+                         help="the module in mm")
+    command.add_argument("--backlash", type=float, nargs="+", default=[4],
+                         help="the backlash as a percentage of the pitch")
+    command.add_argument("--addendum", type=float, nargs="+", default=[1])
+    command.add_argument("--dedendum", type=float, nargs="+", default=[1.25])
+    command.add_argument("--step", type=float,
+                         help="the distance between points in mm "
+                         "(0.05 * m by default)")
+    command.add_argument("--tolerance", type=float,
+                         help="place the points adaptively so no chord is "
+                         "further than this from the curve in mm")
+    command.add_argument("--workers", type=int,
+                         help="the number of processes for a batch")
+    addCompactArguments(command)
+    command.set_defaults(function=generate)
+
+    command = commands.add_parser("inspect", help="show a gear's parameters")
+    command.add_argument("file")
+    command.set_defaults(function=inspect)
+
+    command = commands.add_parser("contact-ratio",
+                                  help="count the points of contact")
+    command.add_argument("gear1")
+    command.add_argument("gear2")
+    command.add_argument("--percentage", type=float, default=1,
+                         help="the contact distance as a percentage of the "
+                         "mean reference radius")
+    command.add_argument("--angles", type=int, default=180,
+                         help="the number of angles sampled over one tooth "
+                         "of the first gear, or over a whole turn with "
+                         "--full")
+    command.add_argument("--full", action="store_true",
+                         help="sample a whole turn instead of one tooth")
+    command.set_defaults(function=contactRatio)
+
+    command = commands.add_parser("export", help="convert a gear file")
+    command.add_argument("file")
+    command.add_argument("output", help="the file to save to (xls, gear, "
+                         "xlsx, csv or parquet)")
+    command.set_defaults(function=export)
+
+    command = commands.add_parser("dxf", help="export gear files as DXF "
+                                  "files")
+    command.add_argument("files", nargs="+")
+    command.add_argument("--output", default=".",
+                         help="the directory to save the DXF files to")
+    command.add_argument("--tolerance", type=float, default=0.001,
+                         help="the largest distance in mm between the arcs "
+                         "and the points of the gear")
+    command.add_argument("--thickness", type=float, default=0,
+                         help="the face width in mm, used to extrude the "
+                         "outline in CAD programs")
+    command.add_argument("--workers", type=int,
+                         help="the number of processes for several files")
+    command.set_defaults(function=dxf)
+
+    command = commands.add_parser("vector", help="export gear files as SVG "
+                                  "or PDF outlines")
+    command.add_argument("files", nargs="*",
+                         help="the files to export, every gear in the "
+                         "catalog is exported if none are given")
+    command.add_argument("--output", default=".",
+                         help="the directory to save the outlines to")
+    command.add_argument("--format", choices=("svg", "pdf"), default="svg")
+    command.add_argument("--catalog",
+                         help="the directory of the catalog (data by "
+                         "default)")
+    command.add_argument("--m", type=float,
+                         help="only export catalog gears with this module")
+    command.add_argument("--alpha", type=float)
+    command.add_argument("--z", type=int)
+    command.add_argument("--workers", type=int)
+    command.set_defaults(function=vector)
+
+    command = commands.add_parser("convert", help="convert xls files to "
+                                  "binary gear files")
+    command.add_argument("files", nargs="+")
+    command.add_argument("--float32", action="store_true",
+                         help="save the points as 32 bit numbers to halve "
+                         "the size of the file")
+    addCompactArguments(command)
+    command.set_defaults(function=convert)
+
+    command = commands.add_parser("catalog", help="find gears in a "
+                                  "directory by their parameters")
+    command.add_argument("directory", nargs="?",
+                         help="the directory to search (data by default)")
+    command.add_argument("--m", type=float, help="the module in mm")
+    command.add_argument("--alpha", type=float,
+                         help="the pressure angle in degrees")
+    command.add_argument("--z", type=int, help="the number of teeth")
+    command.add_argument("--min-z", type=int)
+    command.add_argument("--max-z", type=int)
+    command.add_argument("--min-d", type=float,
+                         help="the smallest reference diameter in mm")
+    command.add_argument("--max-d", type=float)
+    command.set_defaults(function=catalog)
+
+    return parser
+
+def main(argv=None):
+    arguments = createParser().parse_args(argv)
+    try:
+        return arguments.function(arguments)
+    except ImportError as error:
+        # An optional module needed by the command is not installed
+        sys.stderr.write("Error: {}\n".format(error))
+        return 1
+
+# If this program is being run directly this code will be executed
+# If this program is being imported this code will not be executed
+if __name__ == "__main__":
+    sys.exit(main())
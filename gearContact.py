@@ -0,0 +1,254 @@
+# Import required modules
+
+# This module counts the points of contact between 2 meshing gears as the
+# driver rotates
+# Every angle of rotation is handled at once: the profiles are rotated into
+# a stacked (angles, N, 2) array, the points where each profile crosses the
+# line of action are found with sign tests on the whole array and the pairs
+# of crossings which are close enough to be in contact are found with a grid
+# index, without any python loops over the points
+# The meshing repeats every tooth of the driver, so the periodic functions
+# only sample one pitch
+
+# This imports the core functions for working with gears
+# We do not have to import numpy etc. as this is done in gearCore
+from gearCore import *
+# GridIndex finds the crossings which are close to each other
+from gearIndex import GridIndex, PolarIndex, PolarProfile
+# actionLimits finds the ends of the line of action
+from gearMesh import actionLimits
+
+# The largest number of rotated points which are held in memory at once
+# The angles are split into blocks so that large profiles do not use too
+# much memory
+blockPoints = 2**21
+# The largest number of angles in a block
+# Only the points which face the other gear at one of the angles of a block
+# are rotated, so small blocks of nearby angles rotate fewer points
+blockAngles = 16
+
+def actionCrossings(points, limits, alpha, indexes):
+    # Find the points of a stacked (angles, N, 2) array of profiles where
+    # the profile crosses the line of action between one point and the next
+    # indexes are the positions of the points on the whole profile, so only
+    # neighbouring points are compared
+    # Only the points inside a box 1.25 times the size of the line of action
+    # are used
+    # Returns the index of the angle and the point of each crossing
+    xa, ya = limits
+    x = points[:, :-1, 0]
+    y = points[:, :-1, 1]
+
+    # The sign of the distance of each point from the line of action
+    side = numpy.sign(points[..., 1]
+                      - points[..., 0] * numpy.tan(numpy.pi/2 + alpha))
+
+    crossing = ((x > 1.25*xa[0]) & (x < 1.25*xa[1])
+                & (y < 1.25*ya[0]) & (y > 1.25*ya[1])
+                & (side[:, :-1] * side[:, 1:] < 0)
+                & (numpy.diff(indexes) == 1))
+
+    return numpy.nonzero(crossing)
+
+def facingPoints(profile, rotations, direction, width):
+    # The indexes of the points of a profile which are within width radians
+    # of a direction after any of the rotations, along with the point after
+    # each of them
+    indexes = profile.angleRange(direction - width - rotations.max(),
+                                 direction + width - rotations.min())
+    return numpy.union1d(indexes, numpy.minimum(indexes + 1,
+                                                len(profile) - 1))
+
+def halfWidth(reach, distance):
+    # The angle either side of the line of centres which a circle of radius
+    # reach covers, seen from a centre a distance away
+    if reach >= distance:
+        return numpy.pi
+    return numpy.arcsin(reach / distance)
+
+def blocks(count, points):
+    # Split count angles into blocks which fit in memory
+    size = max(1, min(blockAngles, blockPoints // max(points, 1)))
+    return range(0, count, size), size
+
+def meshedProfiles(points1, parameters1, points2, parameters2):
+    # Move the gears so that they meet at the origin, with the second gear
+    # turned so that its teeth fit between the teeth of the first
+    # Returns the points and centre of each gear
+    centre1 = (-parameters1["r"], 0)
+    centre2 = (parameters2["r"], 0)
+    points1 = numpy.asarray(points1, dtype=float) + centre1
+    points2 = rotateArray(numpy.asarray(points2, dtype=float),
+                          parameters2["angle"]/2
+                          - parameters2["j_t"]/parameters2["r"]) + centre2
+
+    return points1, centre1, points2, centre2
+
+def contactCounts(points1, parameters1, points2, parameters2, percentage,
+                  angles=None):
+    # Count the points of contact between 2 gears as the driver rotates
+    # percentage is the largest distance between 2 points which are in
+    # contact, as a fraction of the mean reference radius
+    # angles are the angles of rotation of the driver in degrees
+    # Returns an array of the number of points of contact at each angle
+    if angles is None:
+        angles = numpy.linspace(0, 360, 180)
+    angles = numpy.radians(numpy.asarray(angles, dtype=float).reshape(-1))
+
+    points1, centre1, points2, centre2 = meshedProfiles(
+        points1, parameters1, points2, parameters2)
+
+    # The search is limited to where the tip circles cross the line of
+    # action so that contact past the base circles is still counted
+    limits = actionLimits(parameters1, parameters2, tips=True)
+    ratio = parameters1["z"] / parameters2["z"]
+    alpha = numpy.radians(parameters1["alpha"])
+    distance = percentage * (parameters1["r"] + parameters2["r"]) / 2
+
+    # Only the points near the line of action are rotated, which are the
+    # points facing the pitch point at the centre of the box around it
+    profile1 = PolarProfile(points1, centre1)
+    profile2 = PolarProfile(points2, centre2)
+    reach = 1.25 * numpy.hypot(max(numpy.abs(limits[0])),
+                               max(numpy.abs(limits[1])))
+    width1 = halfWidth(reach, parameters1["r"])
+    width2 = halfWidth(reach, parameters2["r"])
+
+    counts = numpy.zeros(len(angles), dtype=int)
+    starts, size = blocks(len(angles), max(len(points1), len(points2)))
+    for start in starts:
+        block = angles[start:start + size]
+
+        indexes1 = facingPoints(profile1, -block, 0, width1)
+        indexes2 = facingPoints(profile2, block*ratio, numpy.pi, width2)
+        p1 = profile1.points(-block, indexes1)
+        p2 = profile2.points(block*ratio, indexes2)
+        rows1, columns1 = actionCrossings(p1, limits, alpha, indexes1)
+        rows2, columns2 = actionCrossings(p2, limits, alpha, indexes2)
+
+        # Find the crossings of the second gear which are close to each
+        # crossing of the first gear at the same angle with a grid index
+        q1 = p1[rows1, columns1]
+        q2 = p2[rows2, columns2]
+        index = GridIndex(q2, distance, rows2)
+        owners, found, d = index.radius(q1, distance, rows1)
+        counts[start:start + len(block)] = numpy.bincount(
+            rows1[owners], minlength=len(block))
+
+    return counts
+
+def interferenceDepths(points1, parameters1, points2, parameters2,
+                       angles=None):
+    # How far the second gear reaches into the first as the driver rotates
+    # The points of the second gear are moved into the frame of the first
+    # gear and checked against it with a polar index, all angles at once
+    # The polar index counts the crossings of its outline so undercut teeth
+    # on either gear are handled
+    # Returns an array of the largest depth in mm at each angle, measured
+    # along the line from the centre of the first gear, which is negative
+    # when the gears do not overlap and minus infinity if no point of the
+    # second gear is inside the tip circle of the first
+    if angles is None:
+        angles = numpy.linspace(0, 360, 180)
+    angles = numpy.radians(numpy.asarray(angles, dtype=float).reshape(-1))
+
+    points1, centre1, points2, centre2 = meshedProfiles(
+        points1, parameters1, points2, parameters2)
+    index = PolarIndex(points1, centre1)
+    profile2 = PolarProfile(points2, centre2)
+    ratio = parameters1["z"] / parameters2["z"]
+
+    # Only the points of the second gear which face the first gear can reach
+    # inside its tip circle
+    width = halfWidth(parameters1["r_a"], parameters1["r"] + parameters2["r"])
+
+    depths = numpy.empty(len(angles))
+    starts, size = blocks(len(angles), len(points2))
+    for start in starts:
+        block = angles[start:start + size]
+
+        # Turning the first gear back by an angle is the same as turning the
+        # second gear forward by it about the centre of the first gear
+        indexes = facingPoints(profile2, block*ratio, numpy.pi, width)
+        p2 = profile2.points(block*ratio, indexes)
+        rotateArray(p2, block[:, numpy.newaxis], centre1, out=p2)
+
+        # Only the points inside the tip circle of the first gear can be
+        # inside it
+        near = (numpy.hypot(p2[..., 0] - centre1[0], p2[..., 1] - centre1[1])
+                <= parameters1["r_a"])
+        depth = numpy.full(near.shape, -numpy.inf)
+        depth[near] = index.depth(p2[near])
+        depths[start:start + len(block)] = depth.max(axis=1)
+
+    return depths
+
+class PeriodicCurve(object):
+    # A result which repeats every tooth of the driver, sampled at evenly
+    # spaced angles over one pitch
+    # The meshing of 2 gears is the same after the driver has turned by one
+    # tooth, so one pitch sampled finely gives more detail than a whole turn
+    # sampled coarsely for a fraction of the work
+    # This relies on every tooth being the same, as it is for generated gears
+
+    def __init__(self, angles, values, period):
+        # The angles and period are in degrees
+        self.angles = numpy.asarray(angles, dtype=float)
+        self.values = numpy.asarray(values)
+        self.period = period
+
+    def __len__(self):
+        return len(self.values)
+
+    def __call__(self, angles):
+        # The value at any angle, which is the value of the sample at or
+        # before the angle within its pitch
+        step = self.period / len(self.values)
+        index = numpy.floor(numpy.mod(angles, self.period) / step + 1e-9)
+        return self.values[numpy.minimum(index.astype(int),
+                                         len(self.values) - 1)]
+
+    def mean(self):
+        return numpy.mean(self.values)
+
+    def min(self):
+        return numpy.min(self.values)
+
+    def max(self):
+        return numpy.max(self.values)
+
+    def full(self, turns=1):
+        # The samples repeated to cover whole turns of the driver
+        # Returns the angles in degrees and the values
+        repeats = int(numpy.ceil(360 * turns / self.period))
+        angles = (self.angles[numpy.newaxis]
+                  + self.period * numpy.arange(repeats)[:, numpy.newaxis])
+        angles = angles.ravel()
+        keep = angles < 360 * turns
+        return angles[keep], numpy.tile(self.values, repeats)[keep]
+
+def pitchAngles(parameters1, samples=360):
+    # Evenly spaced angles of the driver over one tooth pitch in degrees
+    return numpy.linspace(0, numpy.degrees(parameters1["angle"]), samples,
+                          endpoint=False)
+
+def periodicContactCounts(points1, parameters1, points2, parameters2,
+                          percentage, samples=360):
+    # Count the points of contact at samples angles over one pitch
+    angles = pitchAngles(parameters1, samples)
+    counts = contactCounts(points1, parameters1, points2, parameters2,
+                           percentage, angles)
+    return PeriodicCurve(angles, counts, numpy.degrees(parameters1["angle"]))
+
+def periodicInterference(points1, parameters1, points2, parameters2,
+                         samples=360):
+    # The interference depths at samples angles over one pitch
+    angles = pitchAngles(parameters1, samples)
+    depths = interferenceDepths(points1, parameters1, points2, parameters2,
+                                angles)
+    return PeriodicCurve(angles, depths, numpy.degrees(parameters1["angle"]))
+
+# If this program is being run directly this code will be executed
+# If this program is being imported this code will not be executed
+if __name__ == "__main__":
+    print("This module is intended to be imported and not run directly.")
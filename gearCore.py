@@ -3,8 +3,9 @@
 # numpy is used for numpyematical functions
 import numpy
 # xlrd and xlwt are the excel workbook reader and writer modules
-import xlrd
-import xlwt
+# They are slow to import so they are only imported by readData and writeData
+# when a workbook is first used, which keeps the start up time of programs
+# which only use the maths low
 # os is required to find the files in the data directory etc.
 import os
 
@@ -31,7 +32,9 @@ def getDistance(point1, point2):
 
 def getDeltaTheta(r, s):
     # This finds the angle between points on the curve
-    return numpy.arccos((2 * r**2 - s**2) / (2 * r**2))
+    # This is the same as arccos((2 r^2 - s^2) / (2 r^2)) but does not lose
+    # precision when s is much smaller than r
+    return 2 * numpy.arcsin(s / (2 * r))
 
 def getCartesian(r, theta):
     # Converts polar coordinates to cartesian coordinates
@@ -41,24 +44,17 @@ def getCartesian(r, theta):
 
 def getPolar(x, y):
     # Converts cartesian coordinates to polar coordinates
+    # The angle is in the range 0 to 2 pi and x and y can be arrays
     r = numpy.sqrt(x**2 + y**2)
-    theta = numpy.arctan(y / x)
+    theta = numpy.mod(numpy.arctan2(y, x), 2 * numpy.pi)
 
-    if x < 0:
-        theta += numpy.pi
-    if x > 0 and y < 0:
-        theta += 2 * numpy.pi
-    
     return (r, theta)
 
 def convertPolar(x, y):
     # Converts a list of x and y values to polar form
-    a = []
-    b = []
-    for i in range(len(x)):
-        a.append(numpy.sqrt(x[i]**2 + y[i]**2))
-        b.append(numpy.arctan(y[i] / x[i]))
-    return (a, b)
+    a, b = polarArrays(numpy.asarray(x, dtype=float),
+                       numpy.asarray(y, dtype=float))
+    return (a.tolist(), b.tolist())
 
 def points(r, alpha):
     # This generates the curved part of the tooth
@@ -78,33 +74,92 @@ def rotate(point, theta, centre):
 
 def rotatePoints(points, theta, centre):
     # This implements the rotate function for a list of points
-    a = []
-    b = []
-    for p in points:
-        point = rotate(p, theta, centre)
-        a.append(point[0])
-        b.append(point[1])
-    return list(zip(a, b))
+    points = rotateArray(numpy.asarray(points, dtype=float).reshape(-1, 2),
+                         theta, centre)
+    return list(zip(points[:, 0].tolist(), points[:, 1].tolist()))
 
 def rotatePointList(x, y, theta, centre):
     # This implements the rotate function on a list of x and y values
-    a = []
-    b = []
-    for i in range(len(x)):
-        point = rotate((x[i], y[i]), theta, centre)
-        a.append(point[0])
-        b.append(point[1])
-    return (a, b)
+    a, b = rotateArrays(numpy.asarray(x, dtype=float),
+                        numpy.asarray(y, dtype=float), theta, centre)
+    return (a.tolist(), b.tolist())
 
 def circlePoints(r, step):
     # This function will return a list of points for a circle of radius r
-    x = []
-    y = []
-    for theta in numpy.arange(0, 2 * numpy.pi, getDeltaTheta(r, step)):
-        point = getCartesian(r, theta)
-        x.append(point[0])
-        y.append(point[1])
-    return (x, y)
+    points = circleArray(r, step)
+    return (points[:, 0].tolist(), points[:, 1].tolist())
+
+# The functions below work on numpy arrays instead of lists
+# Points are either an (N, 2) array or separate x and y arrays
+# The out argument is an optional array to write the result into
+# which avoids allocating a new array every time the function is called
+
+def rotateArrays(x, y, theta, centre=(0, 0), out=None):
+    # Rotate arrays of x and y values about a centre
+    # theta can be an array which is broadcast against x and y
+    cos = numpy.cos(theta)
+    sin = numpy.sin(theta)
+    x = numpy.subtract(x, centre[0])
+    y = numpy.subtract(y, centre[1])
+
+    if out is None:
+        shape = numpy.broadcast(x, cos).shape
+        out = (numpy.empty(shape), numpy.empty(shape))
+
+    # x and y are copies so the output can be the input arrays
+    numpy.multiply(x, cos, out=out[0])
+    numpy.subtract(out[0], y * sin, out=out[0])
+    numpy.add(out[0], centre[0], out=out[0])
+    numpy.multiply(x, sin, out=out[1])
+    numpy.add(out[1], y * cos, out=out[1])
+    numpy.add(out[1], centre[1], out=out[1])
+
+    return out
+
+def rotateArray(points, theta, centre=(0, 0), out=None):
+    # Rotate an (N, 2) array of points about a centre
+    if out is None:
+        out = numpy.empty(numpy.shape(points))
+    rotateArrays(points[..., 0], points[..., 1], theta, centre,
+                 out=(out[..., 0], out[..., 1]))
+    return out
+
+def polarArrays(x, y, out=None):
+    # Converts arrays of cartesian coordinates to polar coordinates
+    # The angle is in the range 0 to 2 pi
+    if out is None:
+        shape = numpy.broadcast(x, y).shape
+        out = (numpy.empty(shape), numpy.empty(shape))
+
+    # The angle is calculated first so x and y can be overwritten by r
+    theta = numpy.arctan2(y, x)
+    numpy.hypot(x, y, out=out[0])
+    numpy.mod(theta, 2 * numpy.pi, out=out[1])
+
+    return out
+
+def cartesianArrays(r, theta, out=None):
+    # Converts arrays of polar coordinates to cartesian coordinates
+    if out is None:
+        shape = numpy.broadcast(r, theta).shape
+        out = (numpy.empty(shape), numpy.empty(shape))
+
+    # The sine and cosine are calculated first so r and theta can be
+    # overwritten by the output
+    x = numpy.multiply(r, numpy.cos(theta))
+    sin = numpy.sin(theta)
+    numpy.multiply(r, sin, out=out[1])
+    out[0][...] = x
+
+    return out
+
+def circleArray(r, step, out=None):
+    # Returns an (N, 2) array of points for a circle of radius r
+    theta = numpy.arange(0, 2 * numpy.pi, getDeltaTheta(r, step))
+    if out is None:
+        out = numpy.empty((len(theta), 2))
+    cartesianArrays(r, theta, out=(out[:, 0], out[:, 1]))
+    return out
 
 def calculateParameters(z, alpha, m, backlash, addendum, dedendum):
     # Calculate the reference diameter and radius
@@ -146,24 +201,33 @@ def calculateParameters(z, alpha, m, backlash, addendum, dedendum):
     return parameters
 
 def listXls():
-    # Create a list of all the files in the data directory
-    path = os.getcwd() + "\\data"
-    files = os.listdir(path)
+    # Create a list of all the xls files in the data directory
+    # The files are found with the catalog of the data directory, which only
+    # reads the files which have changed since it was last updated
+    import gearCatalog
+    return gearCatalog.listGears(extensions=(".xls",))
+
+def sheetParameters(sheet):
+    # Create a dictionary of parameters from the 2 columns of a sheet
+    if sheet.nrows == 0:
+        return {}
+    return dict(zip(sheet.col_values(0), sheet.col_values(1)))
 
-    # Find the files with a .xls file extension
-    xlsFiles = []
-    for file in files:
-        if file.split(".")[-1] == "xls":
-            xlsFiles.append(path + "\\" + file)
+def readData(fileName):
+    # Read from an xls file or a binary gear file
+    # Binary gear files are recognised by their first bytes and the points
+    # are returned as a read only array which is mapped from the file
+    import gearFormat
+    if gearFormat.isGearFile(fileName):
+        return gearFormat.readGear(fileName)
 
-    # This is for if no xls files are found
-    if len(xlsFiles) == 0:
-        xlsFiles.append(None)
+    # Large profiles saved as csv, xlsx or parquet are read by gearStream
+    if os.path.splitext(fileName)[1].lower() in (".csv", ".xlsx", ".parquet"):
+        import gearStream
+        return gearStream.readProfile(fileName)
 
-    return xlsFiles
+    import xlrd
 
-def readData(fileName):
-    # Read from an xls file
     # Open the file as a workbook
     workbook = xlrd.open_workbook(fileName)
 
@@ -171,22 +235,55 @@ def readData(fileName):
     pointsSheet = workbook.sheet_by_name("Points")
     parametersSheet = workbook.sheet_by_name("Parameters")
 
-    # Iterate through the points and add them to a list of x and y values
-    points = []
-    for row in range(pointsSheet.nrows):
-        points.append([])
-        points[row].append(pointsSheet.cell(row, 0).value)
-        points[row].append(pointsSheet.cell(row, 1).value)
+    # Read the x and y columns in one go into an (N, 2) array
+    if pointsSheet.nrows == 0:
+        points = numpy.empty((0, 2))
+    else:
+        points = numpy.column_stack((pointsSheet.col_values(0),
+                                     pointsSheet.col_values(1)))
+
+    return points, sheetParameters(parametersSheet)
+
+def readParameters(fileName):
+    # Read only the parameters from an xls file or a binary gear file
+    # The workbook is opened on demand so the points sheet is never parsed,
+    # which makes checking the parameters of a gear much faster
+    import gearFormat
+    if gearFormat.isGearFile(fileName):
+        return gearFormat.readGearParameters(fileName)
 
-    # Iterate through the parameters and create a dictionary of parameters
-    parameters = {}
-    for row in range(parametersSheet.nrows):
-        parameters[parametersSheet.cell(row, 0).value] = parametersSheet.cell(row, 1).value
+    if os.path.splitext(fileName)[1].lower() in (".csv", ".xlsx", ".parquet"):
+        import gearStream
+        return gearStream.readProfileParameters(fileName)
 
-    return points, parameters
+    import xlrd
+
+    workbook = xlrd.open_workbook(fileName, on_demand=True)
+    try:
+        return sheetParameters(workbook.sheet_by_name("Parameters"))
+    finally:
+        workbook.release_resources()
 
 def writeData(fileName, points, parameters):
-    # Write to an xls file
+    # Write to an xls file, or a binary gear file if the extension is .gear
+    # Profiles which are too large for an xls file can be saved as csv, xlsx
+    # or parquet files, which are written in chunks by gearStream
+    extension = os.path.splitext(fileName)[1].lower()
+    if extension == ".gear":
+        import gearFormat
+        return gearFormat.writeGear(fileName, points, parameters)
+    elif extension in (".csv", ".xlsx", ".parquet"):
+        import gearStream
+        return gearStream.writeProfile(fileName, points, parameters)
+
+    # An xls sheet has at most 65,536 rows
+    if len(points) > 65536:
+        raise ValueError("{} points is too many for an xls file, save the "
+                         "gear as a gear, xlsx, csv or parquet file instead"
+                         .format(len(points)))
+
+    import xlwt
+
     # Create a new workbook
     workbook = xlwt.Workbook()
 
@@ -210,9 +307,12 @@ def writeData(fileName, points, parameters):
     workbook.save(fileName)
 
 def readOptions(fileName):
+    # pickle is used to save the options data
+    import pickle
     data = pickle.load(open(fileName, "rb"))
 
 def writeOptions(fileName, data):
+    import pickle
     pickle.dump(data, open(fileName, "wb"))
 
 # If this program is being run directly this code will be executed
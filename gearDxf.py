@@ -0,0 +1,268 @@
+# Import required modules
+
+# This module exports gears as DXF files for laser cutters and CNC machines
+# Instead of a line between every pair of points the outline is fitted with
+# arcs and lines which are within a tolerance of the points, so the tip and
+# root circles become single arcs and the involute and fillet curves become
+# a few arcs each
+# The files are written in the DXF R12 format, which every CAD program reads,
+# without any extra modules
+
+# gearCache contains the cached gear generators
+# We do not have to import numpy etc. as this is done in gearCore
+from gearCache import *
+# findTooth finds the first tooth of a gear so only one tooth is fitted
+from gearFormat import findTooth
+# gearBatch is used to name the gears and report the progress of a batch
+from gearBatch import gearKeys, gearName, checkItem
+import itertools
+import traceback
+import sys
+
+def circleThrough(a, b, c):
+    # The centre of the circle through 3 points
+    # Returns None if the points are in a line
+    d = 2 * (a[0] * (b[1] - c[1]) + b[0] * (c[1] - a[1])
+             + c[0] * (a[1] - b[1]))
+    if d == 0:
+        return None
+
+    a2 = a[0]**2 + a[1]**2
+    b2 = b[0]**2 + b[1]**2
+    c2 = c[0]**2 + c[1]**2
+    x = (a2 * (b[1] - c[1]) + b2 * (c[1] - a[1]) + c2 * (a[1] - b[1])) / d
+    y = (a2 * (c[0] - b[0]) + b2 * (a[0] - c[0]) + c2 * (b[0] - a[0])) / d
+
+    return (x, y)
+
+def fitSegment(points, tolerance):
+    # Fit a line or an arc through the first and last points which is
+    # within the tolerance of all of the points
+    # Returns the segment and its largest error, or None if it does not fit
+    start = points[0]
+    end = points[-1]
+
+    # Try a line first
+    direction = end - start
+    length = numpy.hypot(*direction)
+    if length == 0:
+        return None
+    error = numpy.abs(numpy.cross(direction, points - start)).max() / length
+    if error <= tolerance:
+        return ("line", start[0], start[1], end[0], end[1]), error
+
+    centre = circleThrough(start, points[len(points) // 2], end)
+    if centre is None:
+        return None
+    radius = numpy.hypot(*(start - centre))
+    distance = numpy.hypot(points[:, 0] - centre[0], points[:, 1] - centre[1])
+    error = numpy.abs(distance - radius).max()
+    if error > tolerance:
+        return None
+
+    # The points must go around the arc in one direction without turning back
+    angles = numpy.unwrap(numpy.arctan2(points[:, 1] - centre[1],
+                                        points[:, 0] - centre[0]))
+    steps = numpy.diff(angles)
+    if not (numpy.all(steps > 0) or numpy.all(steps < 0)):
+        return None
+    if abs(angles[-1] - angles[0]) >= 2 * numpy.pi:
+        return None
+
+    # DXF arcs always go anticlockwise from the start angle to the end angle
+    startAngle = numpy.degrees(angles[0]) % 360
+    endAngle = numpy.degrees(angles[-1]) % 360
+    if steps[0] < 0:
+        startAngle, endAngle = endAngle, startAngle
+
+    return ("arc", centre[0], centre[1], radius, startAngle, endAngle), error
+
+def fitArcs(points, tolerance):
+    # Fit a path of points with as few lines and arcs as possible
+    # Each segment is made as long as it can be while it stays within the
+    # tolerance of the points, which is found by doubling the length and
+    # then bisecting
+    # Returns the list of segments and the largest error
+    points = numpy.asarray(points, dtype=float)
+    segments = []
+    largest = 0
+    i = 0
+
+    while i < len(points) - 1:
+        # Two points can always be joined by a line
+        best = (i + 1, ("line", points[i][0], points[i][1],
+                        points[i + 1][0], points[i + 1][1]), 0)
+
+        # Double the length of the segment until it does not fit
+        step = 2
+        failed = None
+        while i + step < len(points):
+            fit = fitSegment(points[i:i + step + 1], tolerance)
+            if fit is None:
+                failed = i + step
+                break
+            best = (i + step, fit[0], fit[1])
+            step *= 2
+        if failed is None and best[0] != len(points) - 1:
+            failed = len(points)
+
+        # Bisect between the longest segment which fits and the shortest
+        # which does not
+        if failed != None:
+            low, high = best[0], failed
+            while high - low > 1:
+                middle = (low + high) // 2
+                fit = fitSegment(points[i:middle + 1], tolerance)
+                if fit is None:
+                    high = middle
+                else:
+                    low = middle
+                    best = (middle, fit[0], fit[1])
+
+        segments.append(best[1])
+        largest = max(largest, best[2])
+        i = best[0]
+
+    return segments, largest
+
+def rotateSegments(segments, angle):
+    # Rotate lines and arcs about the origin by an angle in radians
+    rotated = []
+    degrees = numpy.degrees(angle)
+    cos = numpy.cos(angle)
+    sin = numpy.sin(angle)
+    for segment in segments:
+        if segment[0] == "line":
+            rotated.append(("line",
+                            segment[1] * cos - segment[2] * sin,
+                            segment[1] * sin + segment[2] * cos,
+                            segment[3] * cos - segment[4] * sin,
+                            segment[3] * sin + segment[4] * cos))
+        else:
+            rotated.append(("arc",
+                            segment[1] * cos - segment[2] * sin,
+                            segment[1] * sin + segment[2] * cos,
+                            segment[3], (segment[4] + degrees) % 360,
+                            (segment[5] + degrees) % 360))
+    return rotated
+
+def gearSegments(points, parameters, tolerance=0.001):
+    # Fit the outline of a gear with lines and arcs
+    # If every tooth is the same only the first tooth is fitted and the
+    # segments are rotated to create the other teeth
+    # Returns the list of segments and the largest error in mm
+    tooth = findTooth(points, parameters)
+    if tooth is None:
+        return fitArcs(points, tolerance)
+
+    # The first point of the next tooth is included so the teeth join up
+    path = numpy.asarray(points[:len(tooth) + 1], dtype=float)
+    segments, error = fitArcs(path, tolerance)
+
+    outline = []
+    for n in range(int(parameters["z"])):
+        outline += rotateSegments(segments, n * parameters["angle"])
+
+    return outline, error
+
+def dxfText(segments, thickness=0, layer="GEAR"):
+    # The text of a DXF file containing the segments
+    # thickness is the face width of the gear, which CAD programs use to
+    # extrude the lines and arcs
+    lines = ["0", "SECTION", "2", "HEADER", "9", "$ACADVER", "1", "AC1009",
+             "0", "ENDSEC", "0", "SECTION", "2", "ENTITIES"]
+    for segment in segments:
+        if segment[0] == "line":
+            lines += ["0", "LINE", "8", layer]
+            if thickness != 0:
+                lines += ["39", repr(float(thickness))]
+            lines += ["10", repr(float(segment[1])),
+                      "20", repr(float(segment[2])), "30", "0.0",
+                      "11", repr(float(segment[3])),
+                      "21", repr(float(segment[4])), "31", "0.0"]
+        else:
+            lines += ["0", "ARC", "8", layer]
+            if thickness != 0:
+                lines += ["39", repr(float(thickness))]
+            lines += ["10", repr(float(segment[1])),
+                      "20", repr(float(segment[2])), "30", "0.0",
+                      "40", repr(float(segment[3])),
+                      "50", repr(float(segment[4])),
+                      "51", repr(float(segment[5]))]
+    lines += ["0", "ENDSEC", "0", "EOF"]
+
+    return "\n".join(lines) + "\n"
+
+def writeDxf(fileName, points, parameters, tolerance=0.001, thickness=0):
+    # Export a gear as a DXF file
+    # Returns the number of entities and the largest error in mm
+    segments, error = gearSegments(points, parameters, tolerance)
+    with open(fileName, "w") as f:
+        f.write(dxfText(segments, thickness))
+
+    return len(segments), error
+
+def printProgress(done, total):
+    # The default progress report
+    sys.stdout.write("\rExported {} of {} gears".format(done, total))
+    if done == total:
+        sys.stdout.write("\n")
+    sys.stdout.flush()
+
+def exportItem(item, directory, tolerance=0.001, thickness=0, step=None):
+    # Generate a gear and export it as a DXF file
+    # item is either a dictionary of the gear values or the name of a gear
+    # file, and the DXF file is saved in the directory
+    # This is run in the worker processes so any error is returned
+    try:
+        if isinstance(item, str):
+            points, parameters = readData(item)
+            name = os.path.splitext(os.path.basename(item))[0]
+        else:
+            checkItem(item)
+            values = [item[key] for key in gearKeys]
+            parameters = cachedParameters(*values)
+            if step is None:
+                itemStep = 0.05 * item["m"]
+            else:
+                itemStep = step
+            points = cachedPoints(*values, step=itemStep)
+            name = gearName(item)
+
+        os.makedirs(directory, exist_ok=True)
+        fileName = os.path.join(directory, name + ".dxf")
+        count, error = writeDxf(fileName, points, parameters, tolerance,
+                                thickness)
+
+        return (item, fileName, count, error, None)
+    except Exception:
+        return (item, None, 0, None, traceback.format_exc())
+
+def exportBatch(items, directory, tolerance=0.001, thickness=0, step=None,
+                workers=None, progress=printProgress, chunksize=4):
+    # Export many gears as DXF files across all of the cores of the computer
+    # items is a list of dictionaries such as those made by
+    # gearBatch.parameterGrid or a list of gear file names
+    # Each file is written by the worker which fits it, so the gears are
+    # never all held in memory
+    # It returns a list of (item, file name, entities, error, traceback)
+    from concurrent.futures import ProcessPoolExecutor
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for result in executor.map(exportItem, items,
+                                   itertools.repeat(directory),
+                                   itertools.repeat(tolerance),
+                                   itertools.repeat(thickness),
+                                   itertools.repeat(step),
+                                   chunksize=chunksize):
+            results.append(result)
+            if progress != None:
+                progress(len(results), len(items))
+
+    return results
+
+# If this program is being run directly this code will be executed
+# If this program is being imported this code will not be executed
+if __name__ == "__main__":
+    print("This module is intended to be imported and not run directly.")
@@ -0,0 +1,252 @@
+# Import required modules
+
+# This module reads and writes gear files in a binary format which is much
+# faster to load than an xls file
+# The file starts with a short preamble which gives the length of a json
+# header containing the parameters, and the points follow as raw floating
+# point numbers so they can be loaded with numpy.memmap without being copied
+#
+# The layout of a file is:
+#     8 bytes   the magic string which identifies a gear file
+#     2 bytes   the version of the format (little endian unsigned integer)
+#     4 bytes   the length of the header in bytes (little endian unsigned)
+#     2 bytes   reserved
+#     header    json containing "dtype", "count" and "parameters", padded
+#               with spaces so that the points start on a 64 byte boundary
+#     points    count rows of x and y values in the dtype of the header
+#
+# Version 2 files can also be compact. With "layout": "tooth" in the header
+# only the first tooth is saved, as every other tooth is a rotated copy of
+# it, and the gear is rebuilt when it is first used. With "encoding":
+# "delta" the points are rounded to a multiple of "resolution" (in mm) and
+# saved as the differences between neighbouring points in the smallest
+# integer type which holds them
+
+# This imports the core functions for working with gears
+# We do not have to import numpy etc. as this is done in gearCore
+from gearCore import *
+# tilePoints rotates a single tooth to create the full gear
+from gearProfile import tilePoints
+# json is used for the header and struct for the preamble
+import json
+import struct
+
+# The first bytes of every gear file
+gearMagic = b"\x89GEAR\r\n\x1a"
+gearVersion = 2
+# The preamble is the magic string, the version, the header length and 2
+# reserved bytes
+preamble = struct.Struct("<8sHI2x")
+# The points start at a multiple of this many bytes
+alignment = 64
+# The types the points can be saved as
+gearTypes = ("<f8", "<f4")
+# The types the differences can be saved as with the delta encoding
+deltaTypes = ("<i2", "<i4", "<i8")
+
+class ToothProfile(object):
+    # The points of a gear which has been saved as a single tooth
+    # It behaves like the (N, 2) array of the whole gear but the other teeth
+    # are only calculated the first time the points are used, with a single
+    # vectorised rotation
+
+    def __init__(self, tooth, z, angle):
+        self.tooth = tooth
+        self.z = z
+        self.angle = angle
+        self.points = None
+
+    def expand(self):
+        # Rotate the tooth to create the whole gear
+        if self.points is None:
+            self.points = tilePoints(numpy.asarray(self.tooth, dtype=float),
+                                     self.z, self.angle)
+            self.points.setflags(write=False)
+        return self.points
+
+    def __array__(self, dtype=None, copy=None):
+        points = self.expand()
+        if dtype != None:
+            return points.astype(dtype)
+        if copy:
+            return points.copy()
+        return points
+
+    def __len__(self):
+        return self.z * len(self.tooth) + 1
+
+    def __getitem__(self, index):
+        return self.expand()[index]
+
+    def __iter__(self):
+        return iter(self.expand())
+
+    @property
+    def shape(self):
+        return (len(self), 2)
+
+    def tolist(self):
+        return self.expand().tolist()
+
+def findTooth(points, parameters, tolerance=1e-9):
+    # Find the first tooth of a gear which has every tooth the same
+    # Returns None if the points are not a tooth repeated z times (such as
+    # gears which have been edited or generated by older versions)
+    points = numpy.asarray(points, dtype=float)
+    z = int(parameters["z"])
+    if z < 1 or len(points) < 2 or (len(points) - 1) % z != 0:
+        return None
+
+    tooth = points[:(len(points) - 1) // z]
+    error = numpy.abs(tilePoints(tooth, z, parameters["angle"]) - points)
+    if error.max() > tolerance * max(1, parameters["r_a"]):
+        return None
+
+    return tooth
+
+def deltaEncode(points, resolution):
+    # Round the points to a multiple of the resolution and find the
+    # differences between neighbouring points
+    # The first row is the first point itself
+    values = numpy.round(points / resolution).astype(numpy.int64)
+    deltas = numpy.diff(values, axis=0, prepend=numpy.zeros((1, 2),
+                                                            numpy.int64))
+
+    # Use the smallest type which holds every difference
+    for dtype in deltaTypes:
+        information = numpy.iinfo(dtype)
+        if (len(deltas) == 0 or (deltas.min() >= information.min
+                                 and deltas.max() <= information.max)):
+            return deltas.astype(dtype)
+
+def deltaDecode(deltas, resolution):
+    return numpy.cumsum(deltas, axis=0, dtype=numpy.int64) * resolution
+
+def isGearFile(fileName):
+    # Check if a file is a binary gear file by looking at its first bytes
+    try:
+        with open(fileName, "rb") as f:
+            return f.read(len(gearMagic)) == gearMagic
+    except OSError:
+        return False
+
+def readHeader(f):
+    # Read the preamble and header of an open file
+    # Returns the header and the position of the first point
+    data = f.read(preamble.size)
+    if len(data) != preamble.size:
+        raise ValueError("The file is too short to be a gear file")
+
+    magic, version, length = preamble.unpack(data)
+    if magic != gearMagic:
+        raise ValueError("The file is not a gear file")
+    if version > gearVersion:
+        raise ValueError("Version {} gear files are not supported"
+                         .format(version))
+
+    header = json.loads(f.read(length).decode("utf-8"))
+    return header, preamble.size + length
+
+def writeGear(fileName, points, parameters, dtype="<f8", tooth=False,
+              resolution=None):
+    # Write the points and parameters to a binary gear file
+    # dtype is "<f8" for 64 bit or "<f4" for 32 bit floating point numbers
+    # With tooth only the first tooth is saved, which makes the file z times
+    # smaller, and with a resolution in mm the points are saved with the
+    # delta encoding instead of as floating point numbers
+    dtype = numpy.dtype(dtype).newbyteorder("<")
+    if dtype.str not in gearTypes:
+        raise ValueError("The points must be saved as float64 or float32")
+
+    header = {}
+    version = 1
+    if tooth:
+        points = findTooth(points, parameters)
+        if points is None:
+            raise ValueError("The gear cannot be saved as a single tooth "
+                             "as its teeth are not all the same")
+        header["layout"] = "tooth"
+        version = 2
+
+    if resolution != None:
+        points = deltaEncode(numpy.asarray(points, dtype=float).reshape(-1, 2),
+                             resolution)
+        header["encoding"] = "delta"
+        header["resolution"] = resolution
+        dtype = points.dtype
+        version = 2
+    else:
+        points = numpy.asarray(points, dtype=dtype).reshape(-1, 2)
+
+    # The parameters are converted to python numbers for json
+    header.update({"dtype": dtype.str, "count": len(points),
+                   "parameters": {key: numpy.asarray(value).item()
+                                  for key, value in parameters.items()}})
+    header = json.dumps(header).encode("utf-8")
+
+    # Pad the header so that the points are aligned
+    padding = -(preamble.size + len(header)) % alignment
+    header += b" " * padding
+
+    # Write to a temporary file first so that a program reading the file
+    # never sees it partly written
+    temporary = "{}.{}.tmp".format(fileName, os.getpid())
+    with open(temporary, "wb") as f:
+        f.write(preamble.pack(gearMagic, version, len(header)))
+        f.write(header)
+        f.write(numpy.ascontiguousarray(points).tobytes())
+    os.replace(temporary, fileName)
+
+def readGear(fileName, memmap=True):
+    # Read the points and parameters from a binary gear file
+    # With memmap the points are mapped from the file instead of being read,
+    # so only the parts which are used are loaded, and they are read only
+    # A gear saved as a single tooth is returned as a ToothProfile
+    with open(fileName, "rb") as f:
+        header, offset = readHeader(f)
+
+        count = header["count"]
+        if count == 0 or not memmap:
+            points = numpy.fromfile(f, dtype=header["dtype"],
+                                    count=2 * count).reshape(count, 2)
+        else:
+            points = numpy.memmap(f, dtype=header["dtype"], mode="r",
+                                  offset=offset, shape=(count, 2))
+
+    if header.get("encoding") == "delta":
+        points = deltaDecode(points, header["resolution"])
+
+    parameters = header["parameters"]
+    if header.get("layout") == "tooth":
+        points = ToothProfile(points, int(parameters["z"]),
+                              parameters["angle"])
+
+    return points, parameters
+
+def readGearParameters(fileName):
+    # Read only the parameters from a binary gear file
+    with open(fileName, "rb") as f:
+        header, offset = readHeader(f)
+    return header["parameters"]
+
+def convertXls(fileName, output=None, dtype="<f8", tooth=False,
+               resolution=None):
+    # Convert an xls gear file to a binary gear file
+    # The new file has the same name with the extension .gear unless an
+    # output file name is given
+    # With tooth the gear is saved as a single tooth if all of its teeth are
+    # the same, otherwise every point is saved
+    if output is None:
+        output = os.path.splitext(fileName)[0] + ".gear"
+
+    points, parameters = readData(fileName)
+    if tooth and findTooth(points, parameters) is None:
+        tooth = False
+    writeGear(output, points, parameters, dtype, tooth, resolution)
+
+    return output
+
+# If this program is being run directly this code will be executed
+# If this program is being imported this code will not be executed
+if __name__ == "__main__":
+    print("This module is intended to be imported and not run directly.")
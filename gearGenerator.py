@@ -3,6 +3,10 @@
 # This imports the core functions for working with gears
 # We do not have to import math etc. as this is done in gearCore
 from gearCore import *
+# gearProfile contains the numpy functions for generating gear teeth
+from gearProfile import *
+# gearIndex checks if points are inside a gear using its sorted angles
+from gearIndex import *
 # Also import the gearViewer program to display what the gear looks like
 from gearViewer import *
 
@@ -119,132 +123,102 @@ def modelGear(*args, **kwargs):
     gearModel.main(fileNames)
 
 def trochoid(t, R, x_0, y_0):
-    x = ((R + x_0) * math.cos(t) + (R * t + y_0) * math.sin(t))
-    y = (- (R + x_0) * math.sin(t) + (R * t + y_0) * math.cos(t))
+    x = ((R + x_0) * numpy.cos(t) + (R * t + y_0) * numpy.sin(t))
+    y = (- (R + x_0) * numpy.sin(t) + (R * t + y_0) * numpy.cos(t))
 
     return (x, y)
 
-def gearPoints(parameters, step):
-    # This is the main function to generate a gear
+def gearTooth(parameters, step):
+    # This generates the points on the first tooth as an (n, 2) array
 
     # gap is the angle between the bases of 2 involute curves
     gap = (parameters["angle"] - ((parameters["s"] / parameters["r"])
         + 2 * (involute(getAlpha(parameters["r_b"], parameters["r"]))
         - involute(getAlpha(parameters["r_b"], parameters["r_b"])))))
 
-    # If the base radius is smaller than the dedendum
-    # set the cut off radius to the dedendum
-    if parameters["r_f"] > parameters["r_b"]:
-        R = parameters["r_f"]
-    else:
-        R = parameters["r_b"]
-
     # Calculate the point used to generate the trochoid curve
     x_0 = - 1.25 * parameters["m"]
-    y_0 = (0.25 * math.pi * parameters["m"] - 1.25 * parameters["m"]
-           * math.tan(math.radians(parameters["alpha"])))
+    y_0 = (0.25 * numpy.pi * parameters["m"] - 1.25 * parameters["m"]
+           * numpy.tan(numpy.radians(parameters["alpha"])))
+
+    # Find the radius where the involute and trochoid curves meet
+    # If the base radius is smaller than the dedendum this is the dedendum
+    R, t = junctionPoint(parameters, lambda t: rotateArrays(
+        *trochoid(- t, parameters["r"], x_0, - y_0), parameters["angle"]))
 
     x = []
     y = []
-    for i in range(parameters["z"]):
-        # Generate the leading curve
-        for r in frange(R, parameters["r_a"], step):
-            alpha = getAlpha(parameters["r_b"], r)
-            
-            point = points(r, alpha)
-            point = rotate(point, (parameters["angle"] * i) + gap / 2, (0, 0))
-
-            x.append(point[0])
-            y.append(point[1])
-        
-        # Generate the trailing curve
-        for r in frange(parameters["r_a"], R, step):
-            alpha = getAlpha(parameters["r_b"], r)
-            
-            point = points(r, -alpha)
-            point = rotate(point, (parameters["angle"] * (i + 1)) - gap / 2,
-                           (0, 0))
-
-            x.append(point[0])
-            y.append(point[1])
-        
-        # Generate the curve between the teeth
-        for t in frange(math.pi, - y_0 / parameters["r"], step / 5):
-            point = trochoid(- t, parameters["r"], x_0, - y_0)
-            point = rotate(point, (parameters["angle"] * (i + 1)) - 2 * math.pi,
-                           (0, 0))
-
-            r, angle = getPolar(*point)
-                
-            if r < parameters["r_f"]:
-                point = getCartesian(parameters["r_f"],
-                                     (parameters["angle"] * (i + 1))
-                                     - 2 * math.pi)
-
-            if r < parameters["r_b"]:
-                x.append(point[0])
-                y.append(point[1])
-
-        # Generate the curve between the teeth
-        for t in frange(- y_0 / parameters["r"], math.pi, step / 5):
-            point = trochoid(t, parameters["r"], x_0, y_0)
-            point = rotate(point, (parameters["angle"] * (i + 1)) - 2 * math.pi,
-                           (0, 0))
-
-            r, angle = getPolar(*point)
-                
-            if r < parameters["r_f"]:
-                point = getCartesian(parameters["r_f"],
-                                     (parameters["angle"] * (i + 1))
-                                     - 2 * math.pi)
-
-            if r < parameters["r_b"]:
-                x.append(point[0])
-                y.append(point[1])
-
-    # Add the first values to the end to make the gear meet up
-    x.append(x[0])
-    y.append(y[0])
-    
-    return (x, y)
 
-def inside(point, centre, a, b):
+    # Generate the leading curve
+    r = numpy.arange(R, parameters["r_a"], step)
+    theta = involuteArray(numpy.arccos(parameters["r_b"] / r)) + gap / 2
+    x.append(r * numpy.cos(theta))
+    y.append(r * numpy.sin(theta))
+
+    # Generate the trailing curve
+    r = numpy.arange(parameters["r_a"], R, -step)
+    theta = (parameters["angle"] - gap / 2
+             - involuteArray(numpy.arccos(parameters["r_b"] / r)))
+    x.append(r * numpy.cos(theta))
+    y.append(r * numpy.sin(theta))
+
+    # Generate the curve between the teeth
+    for t, y_t in ((- numpy.arange(numpy.pi, - y_0 / parameters["r"],
+                                   - step / 5), - y_0),
+                   (numpy.arange(- y_0 / parameters["r"], numpy.pi,
+                                 step / 5), y_0)):
+        x_t, y_t = rotateArrays(*trochoid(t, parameters["r"], x_0, y_t),
+                                parameters["angle"])
+        r = numpy.sqrt(x_t**2 + y_t**2)
+
+        # Points inside the root circle are moved to the end of the tooth
+        x_t[r < parameters["r_f"]] = (parameters["r_f"]
+                                      * numpy.cos(parameters["angle"]))
+        y_t[r < parameters["r_f"]] = (parameters["r_f"]
+                                      * numpy.sin(parameters["angle"]))
+
+        x.append(x_t[r < R])
+        y.append(y_t[r < R])
+
+    return numpy.column_stack((numpy.concatenate(x), numpy.concatenate(y)))
+
+def gearPoints(parameters, step):
+    # This is the main function to generate a gear
+    # The first tooth is rotated to create the rest of the gear
+    points = tilePoints(gearTooth(parameters, step), int(parameters["z"]),
+                        parameters["angle"])
+
+    return (points[:, 0], points[:, 1])
+
+def inside(point, centre, a, b, index=None):
     # This function works out if a point is inside a gear
-    d = getDistance(point, centre)
-    try:
-        theta = math.atan((point[1] - centre[1]) / (point[0] - centre[0]))
-    except ZeroDivisionError:
-        # An exception for if the point has the same x value as the centre
-        theta = math.pi / 2
-    diff = []
-    for item in b:
-        diff.append(abs(item - theta))
-    i = diff.index(min(diff))
-    if d < a[i]:
-        return True
-    elif d == a[i]:
-        return True
-    else:
-        return False
+    # a and b are the x and y values of the points on the gear
+    # Building the index sorts every point on the gear, so when many points
+    # are checked against the same gear the index should be built once with
+    # PolarIndex(numpy.column_stack((a, b)), centre) and passed in
+    if index is None:
+        index = PolarIndex(numpy.column_stack((a, b)), centre)
+    return bool(index.contains(point)[0])
 
 def intersecting(gearPoints1, centre1, angle1, gearPoints2, centre2, angle2):
     from matplotlib import pyplot as plt
-    # Currently not working
-    # This function tries to determine if 2 gears intersect or are touching
-    x, y = zip(*gearPoints1)
-        
-    a, b = rotatePointList(x, y, angle1, centre1)
-    gearPoints2 = rotatePoints(gearPoints2, angle2, centre2)
-    for point in gearPoints2:
-        var = inside(point, centre1, a, b)
-        if var == True:
-            plt.plot(point[0], point[1], "ro")
-            #return True
-        else:
-            plt.plot(point[0], point[1], "go")
-            #pass
+    # This function determines if 2 gears intersect or are touching
+    # The first gear is indexed by angle once and every point of the second
+    # gear is checked against it at the same time
+    # Both gears are rotated by changing the offset of their angles
+    # The points of the second gear inside the first are plotted in red
+    index = PolarIndex(gearPoints1, centre1)
+    index.rotate(angle1)
+    profile = PolarProfile(gearPoints2, centre2)
+    profile.rotate(angle2)
+    points = profile.points()
+    overlap = index.contains(points)
+
+    plt.plot(points[overlap, 0], points[overlap, 1], "ro")
+    plt.plot(points[~overlap, 0], points[~overlap, 1], "go")
     plt.show()
-    #return False
+
+    return bool(overlap.any())
 
 # If this program is being run directly this code will be executed
 # If this program is being imported this code will not be executed
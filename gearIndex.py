@@ -0,0 +1,375 @@
+# Import required modules
+
+# This module contains spatial indexes of the points on gear profiles so that
+# questions such as which points are near a point, which point is the
+# nearest or whether a point is inside a gear are answered without comparing
+# the point with every point on the profile
+#
+# GridIndex divides the plane into square cells and sorts the points by their
+# cell, so the points in a cell are found with a binary search and a radius
+# query only looks at the cells around the point
+# PolarProfile keeps the points in polar form sorted by their angle about the
+# centre of the gear, so it can be rotated without recalculating the points
+# and the points in a range of angles are found with a binary search
+# PolarIndex also checks whether points are inside the gear by counting how
+# many times the outline crosses the ray from the centre through them
+# Every query takes arrays of points and answers them all at once
+
+# This imports the core functions for working with gears
+# We do not have to import numpy etc. as this is done in gearCore
+from gearCore import *
+
+def expandRanges(starts, lengths):
+    # Join the ranges start to start + length into one array, along with the
+    # index of the range each value came from
+    owners = numpy.repeat(numpy.arange(len(starts)), lengths)
+    offsets = numpy.cumsum(lengths) - lengths
+    values = (numpy.arange(lengths.sum()) - offsets[owners] + starts[owners])
+    return owners, values
+
+class GridIndex(object):
+    # A uniform grid of the points of a profile
+    # The points can be split into groups, such as the angles of rotation
+    # of a gear, and queries only find points in the same group
+
+    def __init__(self, points, cell=None, groups=None):
+        # cell is the width of the cells in mm, by default about one point
+        # falls in each cell
+        self.points = numpy.asarray(points, dtype=float).reshape(-1, 2)
+        if groups is None:
+            groups = numpy.zeros(len(self.points), dtype=numpy.int64)
+        self.groups = numpy.asarray(groups, dtype=numpy.int64)
+
+        if (cell is None or cell <= 0) and len(self.points) > 1:
+            span = numpy.ptp(self.points, axis=0).max()
+            cell = span / numpy.sqrt(len(self.points))
+        if cell is None or cell <= 0:
+            cell = 1
+        self.cell = cell
+        self.origin = (self.points.min(axis=0) if len(self.points) != 0
+                       else numpy.zeros(2))
+
+        # The cells are numbered so that each group and cell has one key
+        cells = self.cells(self.points)
+        self.width = (cells[:, 0].max() + 3 if len(cells) != 0 else 3)
+        self.height = (cells[:, 1].max() + 3 if len(cells) != 0 else 3)
+        keys = self.keys(cells, self.groups)
+        self.order = numpy.argsort(keys, kind="stable")
+        self.sortedKeys = keys[self.order]
+
+    def __len__(self):
+        return len(self.points)
+
+    def cells(self, points):
+        # The column and row of the cell of each point
+        return numpy.floor((points - self.origin) / self.cell).astype(
+            numpy.int64)
+
+    def keys(self, cells, groups):
+        # The key of each cell, with -1 for cells outside the grid
+        # The columns and rows are shifted by 1 so that the cells next to the
+        # grid still have their own keys
+        columns = cells[:, 0] + 1
+        rows = cells[:, 1] + 1
+        keys = (groups * self.height + rows) * self.width + columns
+        outside = ((columns < 0) | (columns >= self.width) | (rows < 0)
+                   | (rows >= self.height))
+        keys[outside] = -1
+        return keys
+
+    def candidates(self, queries, groups, reach, ring=False):
+        # Find every point in the cells up to reach cells from each query, or
+        # with ring only the cells exactly reach cells away
+        # Returns the index of the query and the index of the point of each
+        # candidate
+        steps = numpy.arange(-reach, reach + 1)
+        offsets = numpy.stack(numpy.meshgrid(steps, steps), -1).reshape(-1, 2)
+        if ring:
+            offsets = offsets[numpy.abs(offsets).max(axis=1) == reach]
+
+        # The keys of every cell around every query are searched at once
+        cells = (self.cells(queries)[:, numpy.newaxis] + offsets).reshape(-1, 2)
+        keys = self.keys(cells, numpy.repeat(groups, len(offsets)))
+        starts = numpy.searchsorted(self.sortedKeys, keys, "left")
+        lengths = numpy.searchsorted(self.sortedKeys, keys, "right") - starts
+        lengths[keys == -1] = 0
+        owners, positions = expandRanges(starts, lengths)
+
+        return owners // len(offsets), self.order[positions]
+
+    def queryGroups(self, queries, groups):
+        if groups is None:
+            return numpy.zeros(len(queries), dtype=numpy.int64)
+        return numpy.broadcast_to(numpy.asarray(groups, dtype=numpy.int64),
+                                  (len(queries),))
+
+    def radius(self, queries, r, groups=None):
+        # Find the pairs of a query and a point which are closer than r
+        # Returns the index of the query, the index of the point and the
+        # distance between them for each pair
+        queries = numpy.asarray(queries, dtype=float).reshape(-1, 2)
+        groups = self.queryGroups(queries, groups)
+
+        reach = max(0, int(numpy.ceil(r / self.cell)))
+        owners, found = self.candidates(queries, groups, reach)
+        distances = numpy.hypot(*(queries[owners] - self.points[found]).T)
+        close = distances < r
+
+        return owners[close], found[close], distances[close]
+
+    def nearest(self, queries, groups=None):
+        # Find the nearest point to each query
+        # Returns the index of the nearest point and the distance to it, or
+        # -1 and infinity if there are no points in the group of the query
+        queries = numpy.asarray(queries, dtype=float).reshape(-1, 2)
+        groups = self.queryGroups(queries, groups)
+
+        indexes = numpy.full(len(queries), -1, dtype=numpy.int64)
+        distances = numpy.full(len(queries), numpy.inf)
+        # Queries in a group with no points have no nearest point
+        remaining = numpy.flatnonzero(numpy.isin(groups, self.groups))
+
+        # The number of rings of cells between each query and the nearest
+        # and the furthest cells which can hold points, so queries outside
+        # the grid start at its edge and every query stops once every cell
+        # has been checked
+        cells = self.cells(queries)
+        low = numpy.zeros(2, dtype=numpy.int64)
+        high = numpy.array([self.width - 3, self.height - 3])
+        near = numpy.maximum(numpy.maximum(low - cells, cells - high),
+                             0).max(axis=1)
+        far = numpy.maximum(cells - low, high - cells).max(axis=1)
+
+        # Search the rings of cells around each query, starting with its own
+        # cell, keeping the nearest point found so far
+        # Every point within reach cells of a query has been checked, so the
+        # nearest point is the answer once it is within that distance
+        reach = 0
+        while len(remaining) != 0:
+            # Skip the rings which are empty for every query
+            reach = max(reach, near[remaining].min())
+            active = remaining[near[remaining] <= reach]
+
+            owners, found = self.candidates(queries[active], groups[active],
+                                            reach, True)
+            d = numpy.hypot(*(queries[active][owners]
+                              - self.points[found]).T)
+
+            # Sort by the distance so the first candidate of each query is
+            # its nearest in this ring
+            order = numpy.lexsort((d, owners))
+            owners = owners[order]
+            first = numpy.ones(len(owners), dtype=bool)
+            first[1:] = owners[1:] != owners[:-1]
+            best = active[owners[first]]
+            closer = d[order][first] < distances[best]
+            indexes[best[closer]] = found[order][first][closer]
+            distances[best[closer]] = d[order][first][closer]
+
+            remaining = remaining[(distances[remaining] > reach * self.cell)
+                                  & (far[remaining] > reach)]
+            reach += 1
+
+        return indexes, distances
+
+class PolarProfile(object):
+    # The points of a profile in polar form about the centre of the gear
+    # The points are kept in their original order along with their angles
+    # sorted, so the points in a range of angles are found with a binary
+    # search
+    # Rotating the profile only changes an offset which is added to the
+    # angles, and the cartesian points are only calculated when they are
+    # used, from the cached positions relative to the centre, so no sines or
+    # cosines of the points are calculated again however often it is rotated
+
+    def __init__(self, points, centre=(0, 0)):
+        self.centre = centre
+        points = numpy.asarray(points, dtype=float).reshape(-1, 2)
+        self.x = points[:, 0] - centre[0]
+        self.y = points[:, 1] - centre[1]
+        self.r, self.theta = polarArrays(self.x, self.y)
+
+        self.order = numpy.argsort(self.theta, kind="stable")
+        self.sortedTheta = self.theta[self.order]
+
+        # The rotation of the profile in radians
+        self.rotation = 0
+        self.cached = None
+
+    def __len__(self):
+        return len(self.r)
+
+    def rotate(self, angle):
+        # Rotate the profile about its centre by an angle in radians
+        self.rotation += angle
+
+    def cartesian(self, rotation=None, indexes=None, out=None):
+        # The x and y values of the points rotated by rotation radians, which
+        # is the rotation of the profile by default
+        # rotation can be an array of angles, which gives a row of points for
+        # each angle, and indexes selects some of the points
+        if rotation is None and indexes is None:
+            if self.cached != None and self.cached[0] == self.rotation:
+                return self.cached[1]
+            points = self.cartesian(self.rotation, out=out)
+            self.cached = (self.rotation, points)
+            return points
+        elif rotation is None:
+            rotation = self.rotation
+
+        x = self.x
+        y = self.y
+        if indexes is not None:
+            x = x[indexes]
+            y = y[indexes]
+
+        cos = numpy.cos(rotation)
+        sin = numpy.sin(rotation)
+        if numpy.ndim(rotation) != 0:
+            cos = numpy.reshape(cos, (-1, 1))
+            sin = numpy.reshape(sin, (-1, 1))
+        if out is None:
+            shape = numpy.broadcast(x, cos).shape
+            out = (numpy.empty(shape), numpy.empty(shape))
+
+        numpy.multiply(x, cos, out=out[0])
+        numpy.subtract(out[0], y * sin, out=out[0])
+        numpy.add(out[0], self.centre[0], out=out[0])
+        numpy.multiply(x, sin, out=out[1])
+        numpy.add(out[1], y * cos, out=out[1])
+        numpy.add(out[1], self.centre[1], out=out[1])
+
+        return out
+
+    def points(self, rotation=None, indexes=None):
+        # The rotated points as an (N, 2) array, or (angles, N, 2) for an
+        # array of angles
+        return numpy.stack(self.cartesian(rotation, indexes), axis=-1)
+
+    def polar(self):
+        # The radius and angle of each point after the rotation
+        return self.r, numpy.mod(self.theta + self.rotation, 2*numpy.pi)
+
+    def angleRange(self, start, end):
+        # The indexes of the points with angles from start to end in radians
+        # after the rotation, in the order of the points
+        # The range can wrap around past 2 pi
+        if end - start >= 2*numpy.pi:
+            return numpy.arange(len(self))
+        start = numpy.mod(start - self.rotation, 2*numpy.pi)
+        end = numpy.mod(end - self.rotation, 2*numpy.pi)
+        first = numpy.searchsorted(self.sortedTheta, start, "left")
+        last = numpy.searchsorted(self.sortedTheta, end, "right")
+        if start <= end:
+            indexes = self.order[first:last]
+        else:
+            indexes = numpy.concatenate((self.order[first:],
+                                         self.order[:last]))
+        return numpy.sort(indexes)
+
+class PolarIndex(PolarProfile):
+    # A polar profile which can check whether points are inside the gear and
+    # how far they are from its edge
+    # The points are joined in order into a closed outline and a point is
+    # inside if the ray from the centre of the gear out through the point
+    # crosses the outline an odd number of times beyond it, which works for
+    # any outline, including undercut teeth which a ray can cross 3 times
+    # The edges are sorted into bins by the angles they cover so that only
+    # the edges in the bin of a ray are checked against it
+
+    def __init__(self, points, centre=(0, 0)):
+        PolarProfile.__init__(self, points, centre)
+
+        # Each edge joins a point to the next, and the last point to the
+        # first
+        self.next = numpy.roll(numpy.arange(len(self)), -1)
+
+        # The angle each edge starts at going anticlockwise and the angle it
+        # covers
+        turn = numpy.mod(self.theta[self.next] - self.theta + numpy.pi,
+                         2*numpy.pi) - numpy.pi
+        start = numpy.mod(numpy.minimum(self.theta, self.theta + turn),
+                          2*numpy.pi)
+
+        # A turn is divided into a bin of angles for each point and each
+        # edge is listed in every bin it covers, so the edges which can cross
+        # a ray are the edges in the bin of its angle
+        self.bins = max(len(self), 1)
+        first = numpy.floor(start * self.bins / (2*numpy.pi)).astype(
+            numpy.int64)
+        last = numpy.floor((start + numpy.abs(turn)) * self.bins
+                           / (2*numpy.pi)).astype(numpy.int64)
+        edges, bins = expandRanges(first, last - first + 1)
+        bins = bins % self.bins
+        order = numpy.argsort(bins, kind="stable")
+        self.binEdges = edges[order]
+        self.binStarts = numpy.searchsorted(bins[order],
+                                            numpy.arange(self.bins + 1))
+
+    def queryPolar(self, queries, rotation=0):
+        # The radius and angle of the queries relative to the gear, which has
+        # been rotated by rotation radians as well as its own rotation
+        queries = numpy.asarray(queries, dtype=float).reshape(-1, 2)
+        r, theta = polarArrays(queries[:, 0] - self.centre[0],
+                               queries[:, 1] - self.centre[1])
+        return r, numpy.mod(theta - self.rotation - rotation, 2*numpy.pi)
+
+    def crossings(self, r, theta):
+        # Find where the ray from the centre at each angle crosses the edges
+        # of the unrotated outline
+        # Returns the index of the query and the distance of the crossing
+        # from the centre for each crossing
+        bins = numpy.floor(theta * self.bins / (2*numpy.pi)).astype(
+            numpy.int64) % self.bins
+        owners, positions = expandRanges(self.binStarts[bins],
+                                         numpy.diff(self.binStarts)[bins])
+        a = self.binEdges[positions]
+        b = self.next[a]
+
+        # The side of the ray each end of the edge is on
+        cos = numpy.cos(theta[owners])
+        sin = numpy.sin(theta[owners])
+        side1 = self.y[a] * cos - self.x[a] * sin
+        side2 = self.y[b] * cos - self.x[b] * sin
+        cross = (side1 >= 0) != (side2 >= 0)
+
+        # How far along the ray the edge crosses it
+        owners, a, b = owners[cross], a[cross], b[cross]
+        t = side1[cross] / (side1[cross] - side2[cross])
+        x = self.x[a] + t * (self.x[b] - self.x[a])
+        y = self.y[a] + t * (self.y[b] - self.y[a])
+        return owners, x * cos[cross] + y * sin[cross]
+
+    def inside(self, r, owners, distances):
+        # A query is inside if the outline crosses the ray an odd number of
+        # times beyond it
+        beyond = owners[distances >= r[owners]]
+        return numpy.bincount(beyond, minlength=len(r)) % 2 == 1
+
+    def contains(self, queries, rotation=0):
+        # Check if each query is inside or on the edge of the gear
+        r, theta = self.queryPolar(queries, rotation)
+        if len(self) == 0:
+            return numpy.zeros(len(r), dtype=bool)
+        owners, distances = self.crossings(r, theta)
+        return self.inside(r, owners, distances)
+
+    def depth(self, queries, rotation=0):
+        # How far inside the edge of the gear each query is, measured along
+        # the line from the centre of the gear to the nearest crossing of the
+        # outline, and negative for queries outside the gear
+        # For a gear without undercut this is the radius of the edge in the
+        # direction of the query minus the radius of the query
+        r, theta = self.queryPolar(queries, rotation)
+        if len(self) == 0:
+            return numpy.full(len(r), -numpy.inf)
+        owners, distances = self.crossings(r, theta)
+        inside = self.inside(r, owners, distances)
+        nearest = numpy.full(len(r), numpy.inf)
+        numpy.minimum.at(nearest, owners, numpy.abs(distances - r[owners]))
+        return numpy.where(inside, nearest, -nearest)
+
+# If this program is being run directly this code will be executed
+# If this program is being imported this code will not be executed
+if __name__ == "__main__":
+    print("This module is intended to be imported and not run directly.")
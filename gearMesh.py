@@ -0,0 +1,124 @@
+# Import required modules
+
+# This module calculates the geometry of 2 meshing involute gears from
+# their radii and pressure angle instead of by sampling their profiles
+# The teeth touch along the line of action, which is tangent to both base
+# circles and passes through the pitch point. Contact starts where the tip
+# circle of the driven gear crosses the line (the approach) and ends where
+# the tip circle of the driver crosses it (the recess), and the contact
+# ratio is the length of this path of contact divided by the base pitch
+#
+# Every function works on single values or on numpy arrays of values, which
+# are broadcast against each other, so millions of pairs of gears can be
+# checked in a single call
+
+# This imports the core functions for working with gears
+# We do not have to import numpy etc. as this is done in gearCore
+from gearCore import *
+
+def workingAngle(r_b1, r_b2, a):
+    # The working pressure angle in degrees of 2 gears a distance a apart
+    return numpy.degrees(numpy.arccos((r_b1 + r_b2) / a))
+
+def pathOfContact(r_a1, r_b1, r_a2, r_b2, alpha, a=None):
+    # The path of contact of a driver (1) and a driven gear (2)
+    # alpha is the pressure angle in degrees and a is the distance between
+    # the centres, which is the sum of the reference radii by default
+    # Returns a dictionary of:
+    #     a             the centre distance
+    #     alpha_w       the working pressure angle in degrees
+    #     r_w1, r_w2    the working pitch radii
+    #     g_f           the length of approach, from the start of contact to
+    #                   the pitch point
+    #     g_a           the length of recess, from the pitch point to the
+    #                   end of contact
+    #     g_alpha       the length of the path of contact
+    #     interference  True if contact would start or end inside a base
+    #                   circle, the lengths are then limited to the part of
+    #                   the line between the base circles
+    #     l_f, l_a      the distances from the pitch point to where the tip
+    #                   circles cross the line, without the limits
+    r_a1, r_b1, r_a2, r_b2 = numpy.broadcast_arrays(
+        *[numpy.asarray(value, dtype=float) for value in
+          (r_a1, r_b1, r_a2, r_b2)])
+    if a is None:
+        alpha_w = numpy.broadcast_to(numpy.asarray(alpha, dtype=float),
+                                     r_a1.shape)
+        a = (r_b1 + r_b2) / numpy.cos(numpy.radians(alpha_w))
+    else:
+        alpha_w = workingAngle(r_b1, r_b2, a)
+    sin = numpy.sin(numpy.radians(alpha_w))
+    cos = numpy.cos(numpy.radians(alpha_w))
+    r_w1 = r_b1 / cos
+    r_w2 = r_b2 / cos
+
+    # The distance from the pitch point to where each base circle touches
+    # the line of action
+    tangent1 = r_w1 * sin
+    tangent2 = r_w2 * sin
+
+    approach = numpy.sqrt(r_a2**2 - r_b2**2) - tangent2
+    recess = numpy.sqrt(r_a1**2 - r_b1**2) - tangent1
+    interference = (approach > tangent1) | (recess > tangent2)
+    g_f = numpy.minimum(approach, tangent1)
+    g_a = numpy.minimum(recess, tangent2)
+
+    return {"a": a, "alpha_w": alpha_w, "r_w1": r_w1, "r_w2": r_w2,
+            "g_f": g_f, "g_a": g_a, "g_alpha": g_f + g_a,
+            "interference": interference, "l_f": approach, "l_a": recess}
+
+def basePitch(r_b, z):
+    # The distance between neighbouring teeth along the line of action
+    return 2 * numpy.pi * numpy.asarray(r_b, dtype=float) / z
+
+def transverseContactRatio(r_a1, r_b1, z1, r_a2, r_b2, alpha, a=None):
+    # The average number of pairs of teeth in contact
+    path = pathOfContact(r_a1, r_b1, r_a2, r_b2, alpha, a)
+    return path["g_alpha"] / basePitch(r_b1, z1)
+
+def meshGeometry(parameters1, parameters2, a=None):
+    # The geometry of the mesh of a driver and a driven gear
+    # The parameters can hold single values or arrays for many gears
+    # As well as the values of pathOfContact it contains the base pitch
+    # p_b, the contact ratio epsilon_alpha and the points where contact
+    # starts (x_A, y_A) and ends (x_E, y_E), relative to the pitch point with
+    # the driver on the left and the driven gear on the right like the
+    # GearGUI graph
+    geometry = pathOfContact(parameters1["r_a"], parameters1["r_b"],
+                             parameters2["r_a"], parameters2["r_b"],
+                             parameters1["alpha"], a)
+    geometry["p_b"] = basePitch(parameters1["r_b"], parameters1["z"])
+    geometry["epsilon_alpha"] = geometry["g_alpha"] / geometry["p_b"]
+
+    # The line of action slopes up to the left through the pitch point
+    alpha_w = numpy.radians(geometry["alpha_w"])
+    geometry["x_A"] = -geometry["g_f"] * numpy.sin(alpha_w)
+    geometry["y_A"] = geometry["g_f"] * numpy.cos(alpha_w)
+    geometry["x_E"] = geometry["g_a"] * numpy.sin(alpha_w)
+    geometry["y_E"] = -geometry["g_a"] * numpy.cos(alpha_w)
+
+    return geometry
+
+def actionLimits(parameters1, parameters2, tips=False):
+    # The ends of the path of contact relative to the pitch point
+    # With tips the ends are where the tip circles cross the line of action
+    # even if that is past the base circles
+    # Returns the x values and the y values of the 2 ends
+    geometry = meshGeometry(parameters1, parameters2)
+    if tips:
+        alpha_w = numpy.radians(geometry["alpha_w"])
+        xa = [-geometry["l_f"] * numpy.sin(alpha_w),
+              geometry["l_a"] * numpy.sin(alpha_w)]
+        ya = [geometry["l_f"] * numpy.cos(alpha_w),
+              -geometry["l_a"] * numpy.cos(alpha_w)]
+    else:
+        xa = [geometry["x_A"], geometry["x_E"]]
+        ya = [geometry["y_A"], geometry["y_E"]]
+
+    return ([numpy.asarray(x).item() for x in xa],
+            [numpy.asarray(y).item() for y in ya])
+
+# If this program is being run directly this code will be executed
+# If this program is being imported this code will not be executed
+if __name__ == "__main__":
+    print("This module is intended to be imported and not run directly.")
@@ -1,27 +1,29 @@
 # Import required modules
 
 # This imports the core functions for working with gears
-# We do not have to import math etc. as this is done in gearCore
+# We do not have to import numpy etc. as this is done in gearCore
 from gearCore import *
-from gearGenerator import *
-# vpython is the module for 3D graphics
-# vpython must be imported after the file has been chosen
-from vpython import *
-
-class SpeedControl(slider):
-    # A class to control the slider which changes the gear speed
-    
-    def __init__(self, *args, **kwargs):
-        # Initiate the slider object
-        super().__init__(bind=self.updateSpeed, *args, **kwargs)
 
-    def updateSpeed(self):
-        # Does nothing but required as the slider needs a binding
-        pass
-
-    def getSpeed(self):
-        # Returns the value of the slider
-        return self.value
+# vpython is the module for 3D graphics
+# vpython starts a server when it is imported so it is only imported when the
+# model is run, by loadVpython
+vpython = None
+
+# The scene the gears are shown in
+scene = None
+
+def loadVpython():
+    # Import vpython the first time it is needed
+    global vpython
+    if vpython is None:
+        import vpython
+    return vpython
+
+def speedControl(*args, **kwargs):
+    # Create the slider which changes the gear speed
+    # The slider needs a binding but it does nothing as the value of the
+    # slider is read every frame
+    return loadVpython().slider(*args, bind=lambda s: None, **kwargs)
 
 def setCaption(text):
     # Set the text to appear under the window
@@ -32,19 +34,26 @@ def textOut(text):
     scene.append_to_caption("\n" + text)
 
 def main(fileNames):
+    global scene
+    loadVpython()
+
     # Create a new scene and select it to be shown
-    scene = canvas(title="Gear simulation")
+    scene = vpython.canvas(title="Gear simulation")
     scene.select()
 
     # A list of the items in the caption
     captionText = []
 
-    # Load the gear data from an xls file
-    points1, parameters1 = readData(fileNames[0])
-    points2, parameters2 = readData(fileNames[1])
+    # Load the gear parameters from the files
+    parameters1 = readParameters(fileNames[0])
+    parameters2 = readParameters(fileNames[1])
 
     if (parameters1["alpha"] == parameters2["alpha"]
         and parameters1["m"] == parameters2["m"]):
+        # Load the points, which vpython needs as lists
+        points1 = readData(fileNames[0])[0].tolist()
+        points2 = readData(fileNames[1])[0].tolist()
+
         # Calculate the face width of the largest gear
         if parameters1["z"] > parameters2["z"]:
             faceWidth = 0.1 * parameters1["r"]
@@ -53,49 +62,54 @@ def main(fileNames):
 
         setCaption("Building gear 1...")
         # Create a 2D profile of the gear
-        profile = shapes.points(pos=points1)
+        profile = vpython.shapes.points(pos=points1)
         # extrusion is used to project a 2D shape to 3D
-        gear1 = extrusion(path=[vector(-faceWidth/2, 0, 0),
-                                vector(faceWidth/2, 0, 0)],
-                          shape=profile, axis=vector(0, 0, 0))
+        gear1 = vpython.extrusion(path=[vpython.vector(-faceWidth/2, 0, 0),
+                                        vpython.vector(faceWidth/2, 0, 0)],
+                                  shape=profile,
+                                  axis=vpython.vector(0, 0, 0))
         gear1.profile = profile
         # Set the position of gear so the pitch point is at the origin
-        gear1.pos = vector(-parameters1["r"], 0, 0)
+        gear1.pos = vpython.vector(-parameters1["r"], 0, 0)
         # Rotate the gear so that it faces the camera
-        gear1.rotate(angle=math.pi/2, axis=vector(0, 1, 0), origin=gear1.pos)
+        gear1.rotate(angle=numpy.pi/2, axis=vpython.vector(0, 1, 0),
+                     origin=gear1.pos)
         gear1.angle = 0
 
         setCaption("Building gear 2...")
         # Create a 2D profile of the gear
-        profile = shapes.points(pos=points2)
+        profile = vpython.shapes.points(pos=points2)
         # extrusion is used to project a 2D shape to 3D
-        gear2 = extrusion(path=[vector(-faceWidth/2, 0, 0),
-                                vector(faceWidth/2, 0, 0)],
-                          shape=profile, axis=vector(0, 0, 0))
+        gear2 = vpython.extrusion(path=[vpython.vector(-faceWidth/2, 0, 0),
+                                        vpython.vector(faceWidth/2, 0, 0)],
+                                  shape=profile,
+                                  axis=vpython.vector(0, 0, 0))
         gear2.profile = profile
         # Set the position of the gear so the pitch point is at the origin
-        gear2.pos = vector(parameters2["r"], 0, 0)
+        gear2.pos = vpython.vector(parameters2["r"], 0, 0)
         # Rotate the gear so that it faces the camera
-        gear2.rotate(angle=math.pi/2, axis=vector(0, 1, 0), origin=gear2.pos)
-        gear2.rotate(angle=math.pi, axis=vector(1, 0, 0), origin=gear2.pos)
+        gear2.rotate(angle=numpy.pi/2, axis=vpython.vector(0, 1, 0),
+                     origin=gear2.pos)
+        gear2.rotate(angle=numpy.pi, axis=vpython.vector(1, 0, 0),
+                     origin=gear2.pos)
         gear2.rotate(angle=parameters2["angle"]/2, axis=gear2.axis,
                      origin=gear2.pos)
         gear2.angle = parameters2["angle"] / 2
 
         # Clear the caption and create the speed control slider
         setCaption("")
-        s = SpeedControl(min=0, max=0.1, value=0.01)
+        s = speedControl(min=0, max=0.1, value=0.01)
 
         while True:
             # Rotate the gears depending on the speed
-            gear1.rotate(angle=s.getSpeed(), axis=gear1.axis, origin=gear1.pos)
-            gear2.rotate(angle=s.getSpeed() * parameters1["z"]
+            gear1.rotate(angle=s.value, axis=gear1.axis, origin=gear1.pos)
+            gear2.rotate(angle=s.value * parameters1["z"]
                          / parameters2["z"], axis=gear2.axis, origin=gear2.pos)
-            gear1.angle += s.getSpeed()
-            gear2.angle += s.getSpeed() * parameters1["z"] / parameters2["z"]
+            gear1.angle += s.value
+            gear2.angle += s.value * parameters1["z"] / parameters2["z"]
 
             # Slow down the program to avoid using too much CPU power
-            rate(25)
+            vpython.rate(25)
     else:
         print("In order for 2 gears to interact they must have the same pressure angle and module.")
 
@@ -0,0 +1,466 @@
+# Import required modules
+
+# This imports the core functions for working with gears
+# We do not have to import numpy etc. as this is done in gearCore
+from gearCore import *
+
+# This module generates the points on a gear as whole numpy arrays
+# Each part of the tooth (involute, tip, trochoid and root) is calculated
+# for a single tooth which is then rotated to create the other teeth
+# The involute and trochoid curves meet at the radius found by junctionPoint
+# which solves for where the curves cross instead of scanning the trochoid
+
+def involuteArray(alpha):
+    # The involute function for an array of angles
+    return numpy.tan(alpha) - alpha
+
+def polarAngles(x, y):
+    # Find the angle of each point in the range 0 to 2 pi
+    return numpy.mod(numpy.arctan2(y, x), 2 * numpy.pi)
+
+def trochoidArray(t, R, x_0, y_0):
+    # The trochoid curve for an array of parameters t
+    x = ((R + x_0) * numpy.cos(t) + (R * t + y_0) * numpy.sin(t))
+    y = (- (R + x_0) * numpy.sin(t) + (R * t + y_0) * numpy.cos(t))
+
+    return (x, y)
+
+def involuteGap(parameters):
+    # gap is the angle between the bases of 2 involute curves
+    return (parameters["angle"] - ((parameters["s"] / parameters["r"])
+        + 2 * involute(getAlpha(parameters["r_b"], parameters["r"]))))
+
+def trochoidOrigin(parameters):
+    # Calculate the point used to generate the trochoid curve
+    x_0 = - (parameters["h_a"] + parameters["c"])
+    y_0 = (0.25 * numpy.pi * parameters["m"]
+           + x_0 * numpy.tan(numpy.radians(parameters["alpha"])))
+
+    return (x_0, y_0)
+
+def brentRoot(function, a, b, tolerance=1e-15, iterations=100):
+    # Find a root of function between a and b using Brent's method
+    # function(a) and function(b) must have opposite signs
+    f_a = function(a)
+    f_b = function(b)
+    if f_a == 0:
+        return a
+    if f_b == 0:
+        return b
+    if numpy.sign(f_a) == numpy.sign(f_b):
+        raise ValueError("The root is not bracketed by a and b")
+
+    c, f_c = a, f_a
+    d = e = b - a
+    for i in range(iterations):
+        if numpy.sign(f_b) == numpy.sign(f_c):
+            c, f_c = a, f_a
+            d = e = b - a
+        if abs(f_c) < abs(f_b):
+            a, b, c = b, c, b
+            f_a, f_b, f_c = f_b, f_c, f_b
+
+        limit = 2 * numpy.finfo(float).eps * abs(b) + tolerance / 2
+        m = (c - b) / 2
+        if abs(m) <= limit or f_b == 0:
+            return b
+
+        if abs(e) >= limit and abs(f_a) > abs(f_b):
+            # Try inverse quadratic interpolation or the secant method
+            s = f_b / f_a
+            if a == c:
+                p = 2 * m * s
+                q = 1 - s
+            else:
+                q = f_a / f_c
+                r = f_b / f_c
+                p = s * (2 * m * q * (q - r) - (b - a) * (r - 1))
+                q = (q - 1) * (r - 1) * (s - 1)
+            if p > 0:
+                q = - q
+            p = abs(p)
+
+            if 2 * p < min(3 * m * q - abs(limit * q), abs(e * q)):
+                e = d
+                d = p / q
+            else:
+                d = e = m
+        else:
+            # Fall back to bisection
+            d = e = m
+
+        a, f_a = b, f_b
+        b += d if abs(d) > limit else numpy.copysign(limit, m)
+        f_b = function(b)
+
+    return b
+
+def junctionPoint(parameters, fillet=None):
+    # Find where the trochoid curve meets the trailing involute curve
+    # This returns the radius and the trochoid parameter of the junction
+    # fillet is a function giving the x and y values of the trochoid curve
+    # before the gap and defaults to the curve used by toothPoints
+    if parameters["r_f"] > parameters["r_b"]:
+        return (parameters["r_f"], None)
+
+    x_0, y_0 = trochoidOrigin(parameters)
+    if fillet is None:
+        def fillet(theta):
+            return rotateArrays(*trochoidArray(- theta, parameters["r"], x_0,
+                                               - y_0),
+                                parameters["angle"]
+                                - (parameters["j_t"] / parameters["d"]))
+
+    def radius(theta):
+        x, y = fillet(theta)
+        return numpy.sqrt(x**2 + y**2)
+
+    def difference(theta):
+        # The angle between the trochoid and the involute at the same radius
+        x, y = fillet(theta)
+        r = numpy.sqrt(x**2 + y**2)
+        alpha = numpy.arccos(numpy.minimum(parameters["r_b"] / r, 1))
+        return relativeAngles(numpy.arctan2(y, x), parameters["angle"]
+                              - involuteGap(parameters) / 2
+                              - involuteArray(alpha))
+
+    # Find where the trochoid leaves the base circle
+    theta = numpy.linspace(- y_0 / parameters["r"], numpy.pi, 65)
+    r = radius(theta)
+    outside = numpy.flatnonzero(r > parameters["r_b"])
+    if len(outside) == 0:
+        return (parameters["r_b"], None)
+    i = outside[0]
+    if i != 0:
+        start = brentRoot(lambda t: radius(t) - parameters["r_b"],
+                          theta[i - 1], theta[i])
+    else:
+        start = theta[0]
+
+    # Look for the first place the trochoid crosses the involute
+    # Jumps of more than pi are where the angle wraps round and are ignored
+    theta = numpy.linspace(start, numpy.pi, 65)
+    f = difference(theta)
+    crossing = numpy.flatnonzero((numpy.sign(f[:-1]) != numpy.sign(f[1:]))
+                                 & (numpy.abs(numpy.diff(f)) < numpy.pi)
+                                 & (radius(theta[1:]) <= parameters["r_a"]))
+
+    if len(crossing) == 0:
+        # If the curves do not cross the involute starts at the base circle
+        return (parameters["r_b"], start)
+
+    i = crossing[0]
+    theta = brentRoot(difference, theta[i], theta[i + 1])
+
+    return (float(radius(theta)), theta)
+
+def junctionRadius(parameters):
+    # Calculate the radius where the involute and trochoid curves meet
+    return junctionPoint(parameters)[0]
+
+def relativeAngles(angle, theta):
+    # Find the angle of each point relative to theta in the range -pi to pi
+    return numpy.mod(angle - theta + numpy.pi, 2 * numpy.pi) - numpy.pi
+
+def flankPoints(parameters, r, rotation, direction):
+    # Points on an involute curve which leaves the base circle at rotation
+    # direction is 1 for the leading flank and -1 for the trailing flank
+    alpha = numpy.arccos(numpy.minimum(parameters["r_b"] / r, 1))
+    return cartesianArrays(r, rotation + direction * involuteArray(alpha))
+
+def tipPoints(parameters, theta):
+    # Points on the straight line across the top of the tooth
+    # Each point is where the line meets a ray from the centre at theta
+    gap = involuteGap(parameters)
+    inv_a = involute(getAlpha(parameters["r_b"], parameters["r_a"]))
+
+    # Find the end points of the involute curves
+    point1 = getCartesian(parameters["r_a"], gap / 2 + inv_a)
+    point2 = getCartesian(parameters["r_a"], parameters["angle"] - gap / 2
+                          - inv_a)
+    m_1 = (point1[1] - point2[1]) / (point1[0] - point2[0])
+
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        m_2 = numpy.tan(theta)
+        x = (point1[1] - m_1 * point1[0]) / (m_2 - m_1)
+
+    return (x, m_2 * x)
+
+def tipAngles(parameters):
+    # The angles of the 2 ends of the top of the tooth
+    gap = involuteGap(parameters)
+    inv_a = involute(getAlpha(parameters["r_b"], parameters["r_a"]))
+    return (gap / 2 + inv_a, parameters["angle"] - gap / 2 - inv_a)
+
+def filletPoints(parameters, theta, side, R):
+    # Points on the trochoid curve at the root of the tooth
+    # side is -1 for the fillet before the gap and 1 for the one after it
+    # The mask returned shows which points are part of the fillet
+    x_0, y_0 = trochoidOrigin(parameters)
+    x, y = trochoidArray(side * theta, parameters["r"], x_0, side * y_0)
+    x, y = rotateArrays(x, y, parameters["angle"]
+                        + side * (parameters["j_t"] / parameters["d"]))
+    r = numpy.sqrt(x**2 + y**2)
+    angle = numpy.arctan2(y, x)
+
+    # Points inside the root circle are moved onto it
+    clamp = (r < parameters["r_f"]) | (theta < - y_0 / parameters["r"])
+    x = numpy.where(clamp, parameters["r_f"] * numpy.cos(angle), x)
+    y = numpy.where(clamp, parameters["r_f"] * numpy.sin(angle), y)
+
+    # Only keep the points on the correct side of the gap
+    keep = (r < R) & (side * relativeAngles(angle, parameters["angle"]) > 0)
+
+    return (x, y, keep)
+
+def rootAngles(parameters):
+    # Find the angles for the end of the trochoid curves
+    x_0, y_0 = trochoidOrigin(parameters)
+    angle1 = numpy.arctan2(*rotateArrays(
+        *trochoidArray(y_0 / parameters["r"], parameters["r"], x_0, - y_0),
+        parameters["angle"])[::-1])
+    angle2 = numpy.arctan2(*rotateArrays(
+        *trochoidArray(- y_0 / parameters["r"], parameters["r"], x_0, y_0),
+        parameters["angle"])[::-1])
+
+    # Adjust the angles to get the correct range
+    angle1 = angle2 + relativeAngles(angle1, angle2)
+    if angle1 > angle2:
+        angle1 -= 2 * numpy.pi
+
+    return (angle1, angle2)
+
+def stepRange(start, stop, step):
+    # Like numpy.arange but the number of values is found from the ratio of
+    # the range to the step rounded to 9 decimal places
+    # This means a gear scaled to another module has the same number of
+    # points, which numpy.arange does not promise when the ratio is close to
+    # a whole number
+    count = max(int(numpy.ceil(round((stop - start) / step, 9))), 0)
+    return start + step * numpy.arange(count)
+
+def toothPoints(parameters, step):
+    # This generates the points on a single tooth as an (n, 2) array
+    # The tooth starts at an angle of 0 and ends at parameters["angle"]
+    gap = involuteGap(parameters)
+    x_0, y_0 = trochoidOrigin(parameters)
+    R = junctionRadius(parameters)
+    end = parameters["angle"]
+
+    # A list of the x and y arrays for each part of the tooth
+    x = []
+    y = []
+
+    def add(points):
+        x.append(points[0])
+        y.append(points[1])
+
+    # Generate the first part of the involute curve
+    add(flankPoints(parameters, stepRange(R, parameters["r_a"], step),
+                    gap / 2, 1))
+
+    # Generate the top of the tooth
+    angle1, angle2 = tipAngles(parameters)
+    add(tipPoints(parameters, angle1 + stepRange(
+        0, angle2 - angle1, getDeltaTheta(parameters["r_a"], step))))
+
+    # Generate the second part of the involute curve
+    # The point which lies on R is added to the end
+    add(flankPoints(parameters, numpy.append(
+        stepRange(parameters["r_a"], R, -step), R), end - gap / 2, -1))
+
+    if R != parameters["r_f"]:
+        # Generate the first part of the trochoid curve
+        x_t, y_t, keep = filletPoints(parameters, stepRange(
+            numpy.pi, - y_0 / parameters["r"],
+            - getDeltaTheta(parameters["r_b"], step)), -1, R)
+        add((x_t[keep], y_t[keep]))
+
+        # Generate the curve between the teeth
+        angle1, angle2 = rootAngles(parameters)
+        add(cartesianArrays(parameters["r_f"], stepRange(
+            angle1, angle2, getDeltaTheta(parameters["r_f"], step))))
+
+        # Generate the second part of the trochoid curve
+        x_t, y_t, keep = filletPoints(parameters, stepRange(
+            - y_0 / parameters["r"], numpy.pi,
+            getDeltaTheta(parameters["r_b"], step)), 1, R)
+        add((x_t[keep], y_t[keep]))
+    else:
+        # Generate the curve between the teeth
+        add(cartesianArrays(R, stepRange(end - gap / 2, end + gap / 2,
+                                         getDeltaTheta(R, step))))
+
+    return numpy.column_stack((numpy.concatenate(x), numpy.concatenate(y)))
+
+def chordIndices(points, tolerance):
+    # Choose the points on a densely sampled curve so that the chords
+    # between them stay within the tolerance of the curve
+    # A chord of length L across a curve of curvature k deviates by k L^2 / 8
+    # so points are spaced evenly in the integral of sqrt(k / (8 tolerance))
+    lengths = numpy.hypot(*numpy.diff(points, axis=0).T)
+    if len(points) < 3 or lengths.sum() == 0:
+        return numpy.array([0, len(points) - 1])
+
+    # Find the angle turned through at each point on the curve
+    heading = numpy.arctan2(*numpy.diff(points, axis=0).T[::-1])
+    turn = numpy.abs(relativeAngles(numpy.diff(heading), 0))
+    curvature = numpy.zeros(len(points))
+    curvature[1:-1] = turn / numpy.maximum((lengths[:-1] + lengths[1:]) / 2,
+                                           1e-300)
+    curvature[0] = curvature[1]
+    curvature[-1] = curvature[-2]
+
+    # Integrate the point density along the curve
+    density = numpy.sqrt(curvature / (8 * tolerance))
+    count = numpy.concatenate(([0], numpy.cumsum(
+        lengths * (density[:-1] + density[1:]) / 2)))
+
+    # Add a point every time the integral passes a whole number
+    # and at any sharp corners where the curve is not smooth
+    indices = numpy.flatnonzero(numpy.diff(numpy.floor(count)) > 0) + 1
+    corners = numpy.flatnonzero(turn > 0.1) + 1
+
+    return numpy.unique(numpy.concatenate(([0, len(points) - 1], indices,
+                                           corners)))
+
+def chordError(points, indices):
+    # Find the largest distance between a curve and the chords through it
+    chord = numpy.searchsorted(indices, numpy.arange(len(points)),
+                               side="right") - 1
+    chord = numpy.minimum(chord, len(indices) - 2)
+    start = points[indices[chord]]
+    direction = points[indices[chord + 1]] - start
+    offset = points - start
+
+    # The distance from each point to the line segment of its chord
+    length = numpy.maximum(numpy.sum(direction**2, axis=1), 1e-300)
+    t = numpy.clip(numpy.sum(offset * direction, axis=1) / length, 0, 1)
+    distance = numpy.hypot(*(offset - t[:, None] * direction).T)
+
+    return distance.max()
+
+def adaptiveCurve(function, start, stop, tolerance, samples=4096):
+    # Sample a curve with as few points as possible within the tolerance
+    # function returns the x and y values and a mask of the points to keep
+    t = numpy.linspace(start, stop, samples)
+    x, y, keep = function(t)
+
+    # Sample again across just the part of the curve which is kept
+    # so short sections of a long parameter range are still dense
+    kept = numpy.flatnonzero(keep)
+    if len(kept) == 0:
+        return (numpy.empty((0, 2)), 0)
+    if len(kept) < samples:
+        t = numpy.linspace(t[max(kept[0] - 1, 0)],
+                           t[min(kept[-1] + 1, samples - 1)], samples)
+        x, y, keep = function(t)
+
+    points = numpy.column_stack((x[keep], y[keep]))
+    if len(points) < 2:
+        return (points, 0)
+
+    # Reduce the tolerance used to place the points until the chords
+    # are within the tolerance of the dense curve
+    target = tolerance
+    for i in range(8):
+        indices = chordIndices(points, target)
+        error = chordError(points, indices)
+        if error <= tolerance:
+            break
+        target *= 0.6
+
+    return (points[indices], error)
+
+def adaptiveToothPoints(parameters, tolerance):
+    # This generates the points on a single tooth as an (n, 2) array
+    # The points are placed using the curvature so that no chord is further
+    # than tolerance (in mm) from the curve
+    # It also returns the largest chord error of the points
+    gap = involuteGap(parameters)
+    x_0, y_0 = trochoidOrigin(parameters)
+    R = junctionRadius(parameters)
+    end = parameters["angle"]
+
+    def curve(function):
+        # Add a mask to a function which keeps all of the points
+        return lambda t: function(t) + (numpy.ones(len(t), dtype=bool),)
+
+    curves = [(curve(lambda r: flankPoints(parameters, r, gap / 2, 1)),
+               R, parameters["r_a"]),
+              (curve(lambda theta: tipPoints(parameters, theta)),
+               *tipAngles(parameters)),
+              (curve(lambda r: flankPoints(parameters, r, end - gap / 2, -1)),
+               parameters["r_a"], R)]
+
+    if R != parameters["r_f"]:
+        curves.append((lambda theta: filletPoints(parameters, theta, -1, R),
+                       numpy.pi, - y_0 / parameters["r"]))
+        curves.append((curve(lambda theta: cartesianArrays(parameters["r_f"],
+                                                           theta)),
+                       *rootAngles(parameters)))
+        curves.append((lambda theta: filletPoints(parameters, theta, 1, R),
+                       - y_0 / parameters["r"], numpy.pi))
+    else:
+        curves.append((curve(lambda theta: cartesianArrays(R, theta)),
+                       end - gap / 2, end + gap / 2))
+
+    parts = []
+    error = 0
+    for function, start, stop in curves:
+        points, e = adaptiveCurve(function, start, stop, tolerance)
+        parts.append(points)
+        error = max(error, e)
+
+    # Remove the points which are repeated where the curves join
+    points = numpy.concatenate(parts)
+    repeated = numpy.all(numpy.abs(numpy.diff(points, axis=0)) < 1e-12,
+                         axis=1)
+    points = numpy.delete(points, numpy.flatnonzero(repeated) + 1, axis=0)
+
+    # The last point joins onto the first point of the next tooth
+    if numpy.allclose(rotateArray(points[0], end), points[-1], atol=1e-12):
+        points = points[:-1]
+
+    return (points, error)
+
+def tilePoints(tooth, z, angle, close=True):
+    # This rotates a single tooth z times to create the full gear
+    # All of the rotations are applied at once with a stack of matrices
+    theta = angle * numpy.arange(z)
+    cos = numpy.cos(theta)
+    sin = numpy.sin(theta)
+    matrices = numpy.stack((numpy.stack((cos, sin), axis=-1),
+                            numpy.stack((-sin, cos), axis=-1)), axis=-2)
+
+    points = numpy.empty((z * len(tooth) + int(close), 2))
+    numpy.matmul(tooth, matrices, out=points[:z * len(tooth)].reshape(
+        z, len(tooth), 2))
+
+    if close:
+        # Add the first point to the end to make the gear meet up
+        points[-1] = points[0]
+
+    return points
+
+def profilePoints(parameters, step):
+    # This is the main function to generate a gear
+    # One tooth is generated and then rotated to make the other teeth
+    # It returns an (N, 2) array of the points on the gear
+    return tilePoints(toothPoints(parameters, step), int(parameters["z"]),
+                      parameters["angle"])
+
+def adaptivePoints(parameters, tolerance):
+    # Generate a gear with the points placed by adaptiveToothPoints
+    # It returns the (N, 2) array of points and a dictionary reporting the
+    # tolerance, the largest chord error achieved and the number of points
+    tooth, error = adaptiveToothPoints(parameters, tolerance)
+    points = tilePoints(tooth, int(parameters["z"]), parameters["angle"])
+
+    return (points, {"tolerance": tolerance, "error": error,
+                     "count": len(points)})
+
+# If this program is being run directly this code will be executed
+# If this program is being imported this code will not be executed
+if __name__ == "__main__":
+    print("This module is intended to be imported and not run directly.")
@@ -3,6 +3,16 @@
 # This imports the core functions for working with gears
 # We do not have to import numpy etc. as this is done in gearCore
 from gearCore import *
+# gearProfile generates the points on a gear using numpy arrays
+from gearProfile import *
+# gearCache stores the gears which have already been generated
+from gearCache import *
+# gearTasks runs the slow work on background threads
+from gearTasks import *
+# gearMesh calculates the line of action and the contact ratio
+from gearMesh import *
+# PolarProfile rotates the gears in the animation
+from gearIndex import PolarProfile
 
 # Import the frame containing a matplotlib graph
 from graph import *
@@ -19,13 +29,10 @@ from tkinter import messagebox
 from tkinter.colorchooser import askcolor
 
 # matplotlib is the module to generate the graphs
+# pyplot and animation are only imported when an image is exported or an
+# animation is started, and PIL (used for image manipulation) when an image
+# is exported or viewed, so they do not slow down the start of the program
 import matplotlib
-from matplotlib import pyplot as plt
-from matplotlib import animation
-
-# PIL is used for image manipulation
-from PIL import Image, ImageTk
-import io
 
 # sys is used to get the arguments from the command line
 import sys
@@ -92,12 +99,30 @@ class GearGUI(tk.Tk):
         # Add the menubar
         self.menubar = MenuBar(self)
 
+        # A progress bar and cancel button which are shown while files are
+        # loading or a gear is being generated in the background
+        self.status = tk.Frame(self)
+        self.progress = ttk.Progressbar(self.status, mode="indeterminate")
+        self.progress.pack(side="left", fill="x", expand=True, padx=5, pady=2)
+        self.cancelButton = ttk.Button(self.status, text="Cancel",
+                                       command=self.cancelTasks)
+        self.cancelButton.pack(side="right", padx=5, pady=2)
+
+        # Files are read and gears are generated on worker threads so the
+        # window does not freeze
+        self.tasks = TaskRunner(self, busy=self.showBusy)
+
         # Shrink the current axis' height by 10% at the bottom
         # this is so that the legend can fit into the plot
         box = self.axis.get_position()
         self.axis.set_position([box.x0, box.y0 + box.height * 0.1,
                                 box.width, box.height * 0.9])
 
+        # The files which have been opened are cached so that redrawing the
+        # graph (when the window is resized or a line is shown or hidden)
+        # does not read them again
+        self.documents = DocumentCache()
+
         # Store the file names for later use
         self.fileNames = fileNames
 
@@ -110,6 +135,84 @@ class GearGUI(tk.Tk):
         self.canvas.callbacks.connect("scroll_event", self.zoom)
 
     def openFile(self, fileNames, limits=False):
+        # Files which have already been read are drawn straight away and
+        # the others are read on a worker thread and drawn once they have
+        # loaded, so the window does not freeze
+        # Opening another file before they have loaded replaces the request
+        if self.filesLoaded(fileNames):
+            self.tasks.cancel("open")
+            self.drawFiles(fileNames, limits)
+        else:
+            self.tasks.submit("open", self.loadFiles, fileNames,
+                              done=lambda result: self.drawFiles(fileNames,
+                                                                 limits),
+                              error=self.taskError)
+
+    def compatible(self, fileNames):
+        # Check if 2 gears can mesh, which needs the same module and
+        # pressure angle
+        parameters1 = self.documents.parameters(fileNames[0])
+        parameters2 = self.documents.parameters(fileNames[1])
+        return (parameters1["alpha"] == parameters2["alpha"]
+                and parameters1["m"] == parameters2["m"])
+
+    def filesLoaded(self, fileNames):
+        # Check if the files can be drawn without reading them
+        if not all(self.documents.cached(fileName, points=False)
+                   for fileName in fileNames):
+            return False
+        if len(fileNames) > 1 and not self.compatible(fileNames):
+            # Only the parameters are needed to show the gears do not mesh
+            return True
+        return all(self.documents.cached(fileName) for fileName in fileNames)
+
+    def loadFiles(self, fileNames):
+        # Read the files into the document cache
+        # This is run on a worker thread so it must not use tkinter
+        if len(fileNames) == 1 or self.compatible(fileNames):
+            for fileName in fileNames:
+                self.documents.read(fileName)
+
+    def showBusy(self, busy):
+        # Show the progress bar while there are tasks running
+        if busy:
+            self.status.grid(row=1, column=0, sticky="ew")
+            self.progress.start(10)
+        else:
+            self.progress.stop()
+            self.status.grid_remove()
+
+    def cancelTasks(self, *args, **kwargs):
+        # Stop loading or generating, the current gear is left on the graph
+        self.tasks.cancel()
+
+        # Restart the animation
+        self.after(500, self.restartAnimation)
+
+    def taskError(self, exception, text):
+        # Show an error which happened on a worker thread
+        if isinstance(exception, PermissionError):
+            messagebox.showerror("Permission Error",
+"""Permission Error.
+The gear cannot be opened because it is already open in another program.
+Close the program and try again.""")
+        elif isinstance(exception, ImportError):
+            # The module needed to read the format is not installed
+            messagebox.showerror("Missing Module",
+                                 "Missing Module.\n{}".format(exception))
+        else:
+            messagebox.showerror("Error", "Error.\n{}".format(exception))
+
+        # Restart the animation
+        self.after(500, self.restartAnimation)
+
+    def destroy(self):
+        # Stop the worker threads when the window is closed
+        self.tasks.shutdown()
+        tk.Tk.destroy(self)
+
+    def drawFiles(self, fileNames, limits=False):
+        # Draw the gears once the files have been read
         # Record the status of the animation (on / off)
         if self.animationStatus == None:
             self.animationStatus = self.animationOn.get()
@@ -123,23 +226,22 @@ class GearGUI(tk.Tk):
 
         try:
             if len(fileNames) > 1:
-                # Load the gear data from the xls files
-                points1, parameters1 = readData(fileNames[0])
-                points2, parameters2 = readData(fileNames[1])
+                # Load the parameters first as the points are not needed
+                # unless the gears are compatible
+                parameters1 = self.documents.parameters(fileNames[0])
+                parameters2 = self.documents.parameters(fileNames[1])
 
                 self.parameters1 = parameters1
                 self.parameters2 = parameters2
 
                 if (parameters1["alpha"] == parameters2["alpha"]
                     and parameters1["m"] == parameters2["m"]):
-                    # Convert the points to a list of x and y values
-                    x1, y1 = zip(*points1)
-                    x2, y2 = zip(*points2)
-
-                    x1 = numpy.asarray(x1)
-                    y1 = numpy.asarray(y1)
-                    x2 = numpy.asarray(x2)
-                    y2 = numpy.asarray(y2)
+                    # Load the points and convert them to arrays of x and y
+                    # values
+                    points1 = self.documents.read(fileNames[0])[0]
+                    points2 = self.documents.read(fileNames[1])[0]
+                    x1, y1 = numpy.asarray(points1, dtype=float).T
+                    x2, y2 = numpy.asarray(points2, dtype=float).T
 
                     # Check if the gear has backlash
                     if not "j_t" in parameters2.keys():
@@ -151,18 +253,12 @@ class GearGUI(tk.Tk):
                             self.parameters2["j_t"] = 0
 
                     # Rotate the second gear
-                    x2, y2 = rotatePointList(x2, y2, parameters2["angle"] / 2
-                        - parameters2["j_t"] / parameters2["r"], (0, 0))
-
-                    # Convert the x and y values to lists
-                    x1, y1 = list(x1), list(y1)
-                    x2, y2 = list(x2), list(y2)
+                    x2, y2 = rotateArrays(x2, y2, parameters2["angle"] / 2
+                        - parameters2["j_t"] / parameters2["r"])
 
                     # Adjust the x values so the gears don't overlap
-                    for i in range(len(x1)):
-                        x1[i] -= parameters1["r"]
-                    for i in range(len(x2)):
-                        x2[i] += parameters2["r"]
+                    x1 = x1 - parameters1["r"]
+                    x2 = x2 + parameters2["r"]
 
                     # Clear the plot
                     self.axis.clear()
@@ -171,35 +267,9 @@ class GearGUI(tk.Tk):
                     xc = [-parameters1["r"], parameters2["r"], 0]
                     yc = [0, 0, 0]
 
-                    # Calculate the points on the line of action
-                    xa = []
-                    ya = []
-
-                    angle = ((numpy.pi / 2) - numpy.radians(parameters2["alpha"])
-                             - numpy.arcsin(parameters2["r"]
-                             * numpy.sin(numpy.radians(parameters2["alpha"])
-                             + numpy.pi / 2) / parameters2["r_a"]))
-                    l = numpy.sqrt(parameters2["r_a"]**2 + parameters2["r"]**2
-                                  - 2 * parameters2["r_a"] * parameters2["r"]
-                                  * numpy.cos(angle))
-
-                    xa.append(l * numpy.cos(numpy.radians(parameters1["alpha"])
-                                           + numpy.pi / 2))
-                    ya.append(l * numpy.sin(numpy.radians(parameters1["alpha"])
-                                           + numpy.pi / 2))
-
-                    angle = ((numpy.pi / 2) - numpy.radians(parameters1["alpha"])
-                             - numpy.arcsin(parameters1["r"]
-                             * numpy.sin(numpy.radians(parameters1["alpha"])
-                             + numpy.pi / 2) / parameters1["r_a"]))
-                    l = numpy.sqrt(parameters1["r_a"]**2 + parameters1["r"]**2
-                                  - 2 * parameters1["r_a"] * parameters1["r"]
-                                  * numpy.cos(angle))
-
-                    xa.append(l * numpy.cos(numpy.radians(parameters2["alpha"])
-                                           - numpy.pi / 2))
-                    ya.append(l * numpy.sin(numpy.radians(parameters2["alpha"])
-                                           - numpy.pi / 2))
+                    # Calculate the points on the line of action where
+                    # contact starts and ends
+                    xa, ya = actionLimits(parameters1, parameters2)
 
                     self.xa = xa
                     self.ya = ya
@@ -297,6 +367,13 @@ class GearGUI(tk.Tk):
                     self.gear1, = self.axis.plot(x1[:], y1[:], "r")
                     self.gear2, = self.axis.plot(x2[:], y2[:], "r")
 
+                    # Keep the gears in polar form so the animation only
+                    # changes their rotation
+                    self.profile1 = PolarProfile(numpy.column_stack((x1, y1)),
+                                                 (-parameters1["r"], 0))
+                    self.profile2 = PolarProfile(numpy.column_stack((x2, y2)),
+                                                 (parameters2["r"], 0))
+
                     # Adjust the number of columns of the legend
                     if len(self.lines) > 6:
                         cols = 4
@@ -317,6 +394,7 @@ class GearGUI(tk.Tk):
                     #self.axis.autoscale(False)
 
                     # Start the animation
+                    from matplotlib import animation
                     self.ani = animation.FuncAnimation(self.figure,
                                                        self.animate,
                                                        interval=1, blit=False)
@@ -328,11 +406,11 @@ In order 2 for gears to mesh they must have the same module and pressure angle."
                 # Select the first item in the list of file names
                 fileName = fileNames[0]
 
-                # Load the gear data from the xls file
-                points, parameters = readData(fileName)
+                # Load the gear data from the file
+                points, parameters = self.documents.read(fileName)
 
-                # Convert the points into a list of x and y values
-                x, y = zip(*points)
+                # Convert the points into arrays of x and y values
+                x, y = numpy.asarray(points, dtype=float).T
 
                 # Clear the plot
                 self.axis.clear()
@@ -446,11 +524,11 @@ Close the program and try again.""")
         else:
             cross = True
         
-        # Load the gear data from the xls file
-        points, parameters = readData(self.fileNames[0])
+        # Load the gear data from the file
+        points, parameters = self.documents.read(self.fileNames[0])
 
-        # Convert the points into a list of x and y values
-        x, y = zip(*points)
+        # Convert the points into arrays of x and y values
+        x, y = numpy.asarray(points, dtype=float).T
 
         # Calculate the size in inches
         size_inches = (parameters["d_a"] / 25.4,
@@ -460,6 +538,7 @@ Close the program and try again.""")
         resolution = size_pixels[0] / size_inches[0]
 
         # Create the figure to save as an image
+        from matplotlib import pyplot as plt
         fig = plt.figure(frameon=False, dpi=resolution)
         fig.set_size_inches(*size_inches, forward=True)
 
@@ -501,12 +580,27 @@ Close the program and try again.""")
                                      initialdir=os.getcwd() + "\\images",
                                      initialfile=fileName,
                                      filetypes=[("PNG Image", "*.png"),
-                                                ("JPEG Image", "*.jpg")],
+                                                ("JPEG Image", "*.jpg"),
+                                                ("SVG Image", "*.svg"),
+                                                ("PDF Document", "*.pdf")],
                                      defaultextension=".png")
 
-        if fileName != "":
+        if os.path.splitext(fileName)[1].lower() in (".svg", ".pdf"):
+            # Vector images are written straight from the points
+            import gearVector
+            gearVector.writeVector(fileName, points, parameters, linewidth,
+                                   cross)
+            plt.close(fig)
+
+            # Restart the animation
+            self.after(500, self.restartAnimation)
+
+            return True
+        elif fileName != "":
             if ".jpg" in fileName:
                 # Save the image in a buffer
+                import io
+                from PIL import Image
                 buf = io.BytesIO()
                 fig.savefig(buf, format="png")
                 buf.seek(0)
@@ -530,34 +624,53 @@ Close the program and try again.""")
             
             return False
 
+    def exportDXF(self, thickness=0, tolerance=0.001):
+        # Export the first gear as a DXF file
+        # The outline is fitted with arcs and lines on a worker thread
+        import gearDxf
+
+        # Get the name of the file to save to
+        fileName = os.path.splitext(os.path.basename(self.fileNames[0]))[0]
+
+        # Ask the user to select the file name to save as
+        fileName = asksaveasfilename(parent=self,
+                                     initialdir=os.getcwd() + "\\images",
+                                     initialfile=fileName + ".dxf",
+                                     filetypes=[("DXF File", "*.dxf")],
+                                     defaultextension=".dxf")
+        if fileName == "":
+            return False
+
+        points, parameters = self.documents.read(self.fileNames[0])
+        self.tasks.submit("export", gearDxf.writeDxf, fileName, points,
+                          parameters, tolerance, thickness,
+                          done=self.exportedDXF, error=self.taskError)
+
+        return True
+
+    def exportedDXF(self, result):
+        entities, error = result
+        messagebox.showinfo("Export as DXF",
+                            "The gear has been exported as {} arcs and lines "
+                            "within {:.4g} mm of its points.".format(entities,
+                                                                    error))
+
     def animate(self, *args, **kwargs):
         if self.animationOn.get():
-            # Get the current positions of the points
-            x1, y1 = self.gear1.get_data()
-            x2, y2 = self.gear2.get_data()
-
             # Calculate the ratio of speeds
             ratio = self.parameters1["z"] / self.parameters2["z"]
 
-            # Rotate the points
+            # Rotate the gears, which only changes the angle they are drawn at
             if self.parameters1["z"] < self.parameters2["z"]:
-                x1, y1 = rotatePointList(x1, y1,
-                    - 0.05,
-                    (-self.parameters1["r"], 0))
-                x2, y2 = rotatePointList(x2, y2,
-                    ratio * 0.05,
-                    (self.parameters2["r"], 0))
+                self.profile1.rotate(- 0.05)
+                self.profile2.rotate(ratio * 0.05)
             else:
-                x1, y1 = rotatePointList(x1, y1,
-                    - 0.05 / ratio,
-                    (-self.parameters1["r"], 0))
-                x2, y2 = rotatePointList(x2, y2,
-                    0.05,
-                    (self.parameters2["r"], 0))
+                self.profile1.rotate(- 0.05 / ratio)
+                self.profile2.rotate(0.05)
 
             # Update the points
-            self.gear1.set_data(x1, y1)
-            self.gear2.set_data(x2, y2)
+            self.gear1.set_data(*self.profile1.cartesian())
+            self.gear2.set_data(*self.profile2.cartesian())
 
         lines = []
         for line in self.lines:
@@ -620,16 +733,11 @@ Close the program and try again.""")
         self.axis.set_title(text)
 
     def addCircle(self, r, style=None, centre=(0, 0), line=None, new=True):
-        # Generate the list of points on the circle of radius r
-        x, y = circlePoints(r, 0.01)
-
-        # Adjust the coordinates for non-zero centres
-        if centre[0] != 0:
-            for i in range(len(x)):
-                x[i] = x[i] + centre[0]
-        if centre[1] != 0:
-            for i in range(len(y)):
-                y[i] = y[i] + centre[1]
+        # Generate the array of points on the circle of radius r
+        # and adjust the coordinates for non-zero centres
+        points = circleArray(r, 0.01)
+        points += centre
+        x, y = points[:, 0], points[:, 1]
 
         # Set the default style to a red line
         if style == None:
@@ -663,33 +771,71 @@ Close the program and try again.""")
         addendum = kwargs["addendum"]
         dedendum = kwargs["dedendum"]
 
+        # The largest distance in mm allowed between the points and the curve
+        # If it is not given the points are spaced using a fixed step
+        if "tolerance" in kwargs.keys():
+            tolerance = kwargs["tolerance"]
+        else:
+            tolerance = None
+
         if z < 4:
             messagebox.showerror("Input Error",
 """Input Error.
 The gear cannot be generated because it has too few teeth.""")
             return False
         
-        try:
-            # Calculate the parameters for the gear
-            parameters = calculateParameters(z, alpha, m, backlash, addendum,
-                                             dedendum)
-
-            # Calculate the points on the gear
-            x, y = self.gearPoints(parameters, 0.05 * m)
+        # Calculate the parameters for the gear
+        parameters = cachedParameters(z, alpha, m, backlash, addendum,
+                                      dedendum)
+
+        # Calculate the points on the gear as an (N, 2) array on a worker
+        # thread, and save them when they are ready
+        if tolerance != None:
+            # The adaptive points are generated directly so the error they
+            # achieved can be reported
+            self.tasks.submit("generate", adaptivePoints, parameters,
+                              tolerance,
+                              done=lambda result: self.saveGear(
+                                  result[0], parameters, result[1]),
+                              error=self.taskError)
+        else:
+            # Gears which have been generated before are taken from the cache
+            self.tasks.submit("generate", cachedPoints, z, alpha, m, backlash,
+                              addendum, dedendum, step=0.05 * m,
+                              done=lambda points: self.saveGear(points,
+                                                                parameters),
+                              error=self.taskError)
 
-            # This adds the list of x and y values in coordinate form
-            points = list(zip(x, y))
+        return True
 
+    def saveGear(self, points, parameters, report=None):
+        # report is the result of adaptivePoints if a tolerance was given
+        try:
             # Ask the user to select the file name to save as
+            # Large gears can be saved as xlsx, csv or parquet files
             fileName = asksaveasfilename(parent=self, initialdir="data",
                                          filetypes=[("Excel 97-2003 Workbook",
-                                                     "*.xls")],
+                                                     "*.xls"),
+                                                    ("Gear File", "*.gear"),
+                                                    ("Excel Workbook",
+                                                     "*.xlsx"),
+                                                    ("CSV File", "*.csv"),
+                                                    ("Parquet File",
+                                                     "*.parquet")],
                                          defaultextension=".xls")
-            # Save the gear points to an xls file
+            # Save the gear points in the format of the file extension
             writeData(fileName, points, parameters)
 
             self.openFile([fileName])
 
+            # Show the accuracy of the adaptive points
+            if report != None:
+                messagebox.showinfo("Gear Generated",
+"""Gear Generated.
+The gear has {} points which are within {:.3g} mm of the curves.
+The tolerance was {:g} mm.""".format(report["count"], report["error"],
+                              report["tolerance"]))
+
             return True
         except PermissionError:
             messagebox.showerror("Permission Error",
@@ -697,6 +843,10 @@ The gear cannot be generated because it has too few teeth.""")
 The gear cannot be saved because the file is already open in another program.""")
         except FileNotFoundError:
             pass
+        except ImportError as error:
+            # The module needed to write the format is not installed
+            messagebox.showerror("Missing Module",
+                                 "Missing Module.\n{}".format(error))
         except:
             raise
 
@@ -707,203 +857,8 @@ The gear cannot be saved because the file is already open in another program."""
 
     def gearPoints(self, parameters, step):
         # This is the main function to generate a gear
-
-        # gap is the angle between the bases of 2 involute curves
-        gap = (parameters["angle"] - ((parameters["s"] / parameters["r"])
-            + 2 * (involute(getAlpha(parameters["r_b"], parameters["r"]))
-            - involute(getAlpha(parameters["r_b"], parameters["r_b"])))))
-
-        # Calculate the point used to generate the trochoid curve
-        x_0 = - (parameters["h_a"] + parameters["c"])
-        y_0 = (0.25 * numpy.pi * parameters["m"]
-               + x_0 * numpy.tan(numpy.radians(parameters["alpha"])))
-
-        # Calculate the radius where the involute and trochoid curves meet
-        if parameters["r_f"] > parameters["r_b"]:
-            R = parameters["r_f"]
-        else:
-            R = parameters["r_b"]
-            
-            diff = 2 * numpy.pi
-            values = []
-            # Generate the first part of the trochoid curve
-            for theta in numpy.arange(- y_0 / parameters["r"], numpy.pi,
-                                      3 * getDeltaTheta(parameters["r_b"],
-                                                        step)):
-                point = self.trochoid(- theta, parameters["r"], x_0, - y_0)
-                point = rotate(point, parameters["angle"]
-                               - (parameters["j_t"] / parameters["d"])
-                               - 2 * numpy.pi, (0, 0))
-
-                r, angle = getPolar(*point)
-
-                if r > parameters["r_b"]:
-                    try:
-                        alpha = getAlpha(parameters["r_b"], r)
-                        if alpha != None:
-                            inv = (involute(-alpha) + parameters["angle"]
-                                   - gap / 2)
-
-                            if abs(angle - inv) < diff:
-                                diff = abs(alpha - inv)
-                                values.append(r)
-                    except:
-                        pass
-
-            if len(values) != 0:
-                R = values[0]
-
-        x = []
-        y = []
-        for i in range(parameters["z"]):
-            # Generate the first part of the involute curve
-            for r in numpy.arange(R, parameters["r_a"], step):
-                alpha = getAlpha(parameters["r_b"], r)
-                
-                point = points(r, alpha)
-                point = rotate(point, (parameters["angle"] * i) + gap / 2,
-                               (0, 0))
-
-                x.append(point[0])
-                y.append(point[1])
-
-            # Find the end points of the involute curves
-            point1 = getCartesian(parameters["r_a"],
-                                  (parameters["angle"] * i) + gap / 2
-                                  + (involute(getAlpha(parameters["r_b"],
-                                                       parameters["r_a"]))
-                                     - involute(getAlpha(parameters["r_b"],
-                                                         parameters["r_b"]))))
-            point2 = getCartesian(parameters["r_a"],
-                                  (parameters["angle"] * (i + 1)) - gap / 2
-                                  - (involute(getAlpha(parameters["r_b"],
-                                                       parameters["r_a"]))
-                                     - involute(getAlpha(parameters["r_b"],
-                                                         parameters["r_b"]))))
-
-            m_1 = (point1[1] - point2[1]) / (point1[0] - point2[0])
-
-            # Generate the top of the tooth
-            for theta in numpy.arange((parameters["angle"] * i) + gap / 2
-                                      + (involute(getAlpha(parameters["r_b"],
-                                                           parameters["r_a"]))
-                                         - involute(getAlpha(parameters["r_b"],
-                                                             parameters["r_b"]))),
-                                      (parameters["angle"] * (i + 1)) - gap / 2
-                                      - (involute(getAlpha(parameters["r_b"],
-                                                           parameters["r_a"]))
-                                         - involute(getAlpha(parameters["r_b"],
-                                                             parameters["r_b"]))),
-                                      getDeltaTheta(parameters["r_a"], step)):
-                point3 = getCartesian(parameters["r_a"], theta)
-
-                m_2 = point3[1] / point3[0]
-
-                point = [(point1[1] - m_1 * point1[0]) / (m_2 - m_1)]
-                point.append(m_2 * point[0])
-
-                x.append(point[0])
-                y.append(point[1])
-            
-            # Generate the second part of the involute curve
-            for r in numpy.arange(parameters["r_a"], R, -step):
-                alpha = getAlpha(parameters["r_b"], r)
-                
-                point = points(r, -alpha)
-                point = rotate(point, (parameters["angle"] * (i + 1)) - gap / 2,
-                               (0, 0))
-
-                x.append(point[0])
-                y.append(point[1])
-
-            # Add the point which lies on R
-            alpha = getAlpha(parameters["r_b"], R)
-                
-            point = points(R, -alpha)
-            point = rotate(point, (parameters["angle"] * (i + 1)) - gap / 2,
-                           (0, 0))
-
-            x.append(point[0])
-            y.append(point[1])
-            
-            if R != parameters["r_f"]:
-                # Generate the first part of the trochoid curve
-                for theta in numpy.arange(numpy.pi, - y_0 / parameters["r"],
-                                          - getDeltaTheta(parameters["r_b"],
-                                                            step)):
-                    point = self.trochoid(- theta, parameters["r"], x_0, - y_0)
-                    point = rotate(point, (parameters["angle"] * (i + 1))
-                                   - (parameters["j_t"] / parameters["d"])
-                                   - 2 * numpy.pi, (0, 0))
-
-                    r, angle = getPolar(*point)
-                        
-                    if r < parameters["r_f"] or theta < - y_0 / parameters["r"]:
-                        point = getCartesian(parameters["r_f"], angle)
-
-                    if r < R and angle < parameters["angle"] * (i + 1):
-                        x.append(point[0])
-                        y.append(point[1])
-
-                # Find the angles for the end of the trochoid curves
-                point = self.trochoid(y_0 / parameters["r"],
-                                      parameters["r"], x_0, - y_0)
-                point = rotate(point, (parameters["angle"] * (i + 1))
-                               - 2 * numpy.pi, (0, 0))
-                r, angle1 = getPolar(*point)
-                point = self.trochoid(- y_0 / parameters["r"],
-                                      parameters["r"], x_0, y_0)
-                point = rotate(point, (parameters["angle"] * (i + 1))
-                               - 2 * numpy.pi, (0, 0))
-                r, angle2 = getPolar(*point)
-
-                # Adjust the angles to get the correct range
-                if angle1 > angle2:
-                    angle1 -= 2 * numpy.pi
-
-                # Generate the curve between the teeth
-                for theta in numpy.arange(angle1, angle2,
-                                          getDeltaTheta(parameters["r_f"], step)):
-                    point = getCartesian(parameters["r_f"], theta)
-
-                    x.append(point[0])
-                    y.append(point[1])
-
-                # Generate the second part of the trochoid curve
-                for theta in numpy.arange(- y_0 / parameters["r"], numpy.pi,
-                                          getDeltaTheta(parameters["r_b"],
-                                                            step)):
-                    point = self.trochoid(theta, parameters["r"], x_0, y_0)
-                    point = rotate(point, (parameters["angle"] * (i + 1))
-                                   + (parameters["j_t"] / parameters["d"])
-                                   - 2 * numpy.pi, (0, 0))
-
-                    r, angle = getPolar(*point)
-                        
-                    if r < parameters["r_f"] or theta < - y_0 / parameters["r"]:
-                        point = getCartesian(parameters["r_f"], angle)
-
-                    if (r < R and angle > parameters["angle"]
-                        * ((i + 1) % parameters["z"])):
-                        x.append(point[0])
-                        y.append(point[1])
-            else:
-                # Generate the curve between the teeth
-                for theta in numpy.arange((parameters["angle"] * (i + 1))
-                                          - gap / 2,
-                                          (parameters["angle"] * (i + 1))
-                                          + gap / 2,
-                                          getDeltaTheta(R, step)):
-                    point = getCartesian(R, theta)
-
-                    x.append(point[0])
-                    y.append(point[1])
-
-        # Add the first values to the end to make the gear meet up
-        x.append(x[0])
-        y.append(y[0])
-        
-        return (x, y)
+        # The points are calculated as numpy arrays by gearProfile
+        return profilePoints(parameters, step)
 
 class InputFrame(tk.Toplevel):
     def __init__(self, parent, *args, defaults=None, **kwargs):
@@ -950,6 +905,11 @@ class InputFrame(tk.Toplevel):
         self.entry5 = ttk.Entry(self.inputFrame)
         self.label6 = tk.Label(self.inputFrame, text="Dedendum: ")
         self.entry6 = ttk.Entry(self.inputFrame)
+        # If a tolerance is given the points are placed adaptively so they
+        # are within the tolerance of the curves, otherwise a fixed step
+        # is used
+        self.label7 = tk.Label(self.inputFrame, text="Tolerance: (mm) ")
+        self.entry7 = ttk.Entry(self.inputFrame)
 
         # Update the grid layout
         self.toggleAdvanced(show=self.showAdvanced)
@@ -974,6 +934,9 @@ class InputFrame(tk.Toplevel):
             if "dedendum" in defaults.keys():
                 if defaults["dedendum"] != None:
                     self.entry6.insert(0, defaults["dedendum"])
+            if "tolerance" in defaults.keys():
+                if defaults["tolerance"] != None:
+                    self.entry7.insert(0, defaults["tolerance"])
 
         # Create a button to generate the gear
         self.button = ttk.Button(self.buttonFrame, text="Generate Gear",
@@ -1000,9 +963,11 @@ class InputFrame(tk.Toplevel):
             self.entry5.grid(row=4, column=1, sticky="w", pady=2)
             self.label6.grid(row=5, column=0, sticky="e")
             self.entry6.grid(row=5, column=1, sticky="w", pady=2)
+            self.label7.grid(row=6, column=0, sticky="e")
+            self.entry7.grid(row=6, column=1, sticky="w", pady=2)
 
             # Update the position of the advanced label
-            self.advanced.grid(row=6, column=1, sticky="e")
+            self.advanced.grid(row=7, column=1, sticky="e")
         else:
             # Update the arrow direction
             self.advanced.config(text=u"Advanced \u25BC")
@@ -1018,6 +983,8 @@ class InputFrame(tk.Toplevel):
                 self.entry5.grid_forget()
                 self.label6.grid_forget()
                 self.entry6.grid_forget()
+                self.label7.grid_forget()
+                self.entry7.grid_forget()
             except:
                 pass
 
@@ -1030,6 +997,23 @@ class InputFrame(tk.Toplevel):
             backlash = float(self.entry4.get()) / 100
             addendum = float(self.entry5.get())
             dedendum = float(self.entry6.get())
+            # The tolerance is optional
+            if self.entry7.get().strip() != "":
+                tolerance = float(self.entry7.get())
+            else:
+                tolerance = None
+
+            # Check if the tolerance can be reached
+            if tolerance != None and tolerance <= 0:
+                messagebox.showerror("Input Error",
+"""Input Error.
+There is an issue with the values you entered.
+The tolerance must be greater than 0 or left empty.""")
+
+                # Bring the frame into focus
+                self.focus_force()
+
+                return
 
             # Check if the teeth are in proportion
             if addendum > dedendum:
@@ -1046,7 +1030,8 @@ The addendum should be smaller than the dedendum.""")
             # Create a gear from the inputed values
             if self.master.generateGear(z=z, alpha=alpha, m=m,
                                         backlash=backlash, addendum=addendum,
-                                        dedendum=dedendum):
+                                        dedendum=dedendum,
+                                        tolerance=tolerance):
                 # Close the window if successful
                 self.closeWindow()
             else:
@@ -1167,6 +1152,11 @@ class ExportDXFFrame(tk.Toplevel):
                                         text="Helix Angle: (°) ")
         self.helixAngleEntry = tk.Entry(self.inputFrame)
 
+        # Create an entry to get the tolerance of the fitted arcs
+        self.toleranceLabel = tk.Label(self.inputFrame,
+                                       text="Tolerance: (mm) ")
+        self.toleranceEntry = tk.Entry(self.inputFrame)
+
         # Insert default values into the entries if defaults exist
         if defaults != None:
             if "width" in defaults.keys():
@@ -1175,6 +1165,9 @@ class ExportDXFFrame(tk.Toplevel):
             if "beta" in defaults.keys():
                 if defaults["beta"] != None:
                     self.helixAngleEntry.insert(0, defaults["beta"])
+            if "tolerance" in defaults.keys():
+                if defaults["tolerance"] != None:
+                    self.toleranceEntry.insert(0, defaults["tolerance"])
         
         # Create a button to export the image
         exportButton = ttk.Button(self.buttonFrame, text="Export",
@@ -1185,7 +1178,31 @@ class ExportDXFFrame(tk.Toplevel):
         self.focus_force()
 
     def export(self, *args, **kwargs):
-        self.closeWindow()
+        # Read the face width, which is used as the thickness of the lines
+        # and arcs, and the tolerance of the fitted arcs
+        try:
+            width = self.faceWidthEntry.get().strip()
+            if width == "":
+                width = 0
+            thickness = float(width)
+            tolerance = float(self.toleranceEntry.get())
+            if thickness < 0 or tolerance <= 0:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Value Error",
+"""Value Error.
+The face width must be a positive number and the tolerance must be greater
+than zero.""")
+            self.focus_force()
+            return
+
+        # Try to export the gear as a dxf file
+        if self.master.exportDXF(thickness=thickness, tolerance=tolerance):
+            # If the export is successful close the window
+            self.closeWindow()
+        else:
+            # Bring the frame into focus
+            self.focus_force()
 
     def toggleAdvanced(self, *args, **kwargs):
         if "show" in kwargs.keys():
@@ -1200,9 +1217,11 @@ class ExportDXFFrame(tk.Toplevel):
             # Add the advanced options to the grid
             self.helixAngleLabel.grid(row=1, column=0, sticky="e", pady=2)
             self.helixAngleEntry.grid(row=1, column=1, sticky="ew", pady=2)
+            self.toleranceLabel.grid(row=2, column=0, sticky="e", pady=2)
+            self.toleranceEntry.grid(row=2, column=1, sticky="ew", pady=2)
 
             # Update the position of the advanced label
-            self.advanced.grid(row=2, column=1, sticky="e")
+            self.advanced.grid(row=3, column=1, sticky="e")
         else:
             # Update the arrow direction
             self.advanced.config(text=u"Advanced \u25BC")
@@ -1214,6 +1233,8 @@ class ExportDXFFrame(tk.Toplevel):
             try:
                 self.helixAngleLabel.grid_forget()
                 self.helixAngleEntry.grid_forget()
+                self.toleranceLabel.grid_forget()
+                self.toleranceEntry.grid_forget()
             except:
                 pass
 
@@ -1252,9 +1273,11 @@ class ImageViewer(tk.Toplevel):
                                     self.master.title().split(" - ")[-1]))
 
         # Load the image to view
+        from PIL import Image
         self.image = Image.open(fileName)
 
         # Create a version of the image to go in the label
+        from PIL import ImageTk
         copy = self.image.resize(size)
         photo = ImageTk.PhotoImage(copy)
 
@@ -1271,6 +1294,7 @@ class ImageViewer(tk.Toplevel):
             size = (event.height, event.height)
             
         # Create a version of the image to go in the label
+        from PIL import ImageTk
         copy = self.image.resize(size)
         photo = ImageTk.PhotoImage(copy)
 
@@ -1417,7 +1441,8 @@ class MenuBar(tk.Menu):
             fileNames = askopenfilenames(parent=self.master,
                                          initialdir="data",
                                          filetypes=[("Excel 97-2003 Workbook",
-                                                     "*.xls")],
+                                                     "*.xls"),
+                                                    ("Gear File", "*.gear")],
                                          defaultextension=".xls")
 
             if len(fileNames) != 0:
@@ -1433,7 +1458,8 @@ class MenuBar(tk.Menu):
             fileName = askopenfilename(parent=self.master,
                                        initialdir="data",
                                        filetypes=[("Excel 97-2003 Workbook",
-                                                   "*.xls")],
+                                                   "*.xls"),
+                                                  ("Gear File", "*.gear")],
                                        defaultextension=".xls")
 
             if fileName != "":
@@ -1484,7 +1510,8 @@ class MenuBar(tk.Menu):
             sys.exit()"""
 
     def exportDXF(self, *args, **kwargs):
-        ExportDXFFrame(self.master, padx=7, pady=5, defaults={"beta": 0})
+        ExportDXFFrame(self.master, padx=7, pady=5,
+                       defaults={"beta": 0, "tolerance": 0.001})
 
     def closeWindow(self, *args, **kwargs):
         self.master.destroy()
@@ -0,0 +1,243 @@
+# Import required modules
+
+# This module reads and writes gear profiles which are too large for an xls
+# file, which is limited to 65,536 rows
+# The points are written in chunks so the whole file is never held in memory
+# and the points can be given as an array or as an iterable of (n, 2) chunks,
+# such as a generator, so a profile does not need to exist in memory either
+#
+# The formats are chosen by the extension of the file name:
+#     .csv      text with the parameters as comment lines before the points
+#     .xlsx     an Excel workbook written with openpyxl in write only mode
+#     .parquet  a columnar file with a row group per chunk, written with
+#               pyarrow, with the parameters in the metadata
+# openpyxl and pyarrow are optional and are only imported when they are used
+# If one is missing an ImportError naming it is raised before the file is
+# opened
+
+# This imports the core functions for working with gears
+# We do not have to import numpy etc. as this is done in gearCore
+from gearCore import *
+# json is used to save the parameters in the parquet metadata
+import json
+import importlib
+import warnings
+
+# The number of points written at a time
+chunkSize = 65536
+# The largest number of rows in a sheet of an xlsx workbook
+# Larger profiles continue on the sheets "Points 2", "Points 3" etc.
+xlsxRows = 1048576
+
+# The optional module needed by each format
+optionalModules = {".xlsx": "openpyxl", ".parquet": "pyarrow"}
+
+def checkModule(extension):
+    # Check that the optional module of a format is installed so that an
+    # export fails with a clear error before any of the file is written
+    if extension not in optionalModules:
+        return
+    name = optionalModules[extension]
+    try:
+        importlib.import_module(name)
+    except ImportError:
+        raise ImportError("{} files need the optional module {}, which can "
+                          "be installed with pip install {}"
+                          .format(extension, name, name)) from None
+
+def pointChunks(points, size=chunkSize):
+    # Split the points into (n, 2) arrays of at most size rows
+    # An array is sliced without being copied and an iterable of chunks is
+    # passed through, with any large chunks split
+    if hasattr(points, "shape"):
+        points = [points]
+
+    for chunk in points:
+        chunk = numpy.asarray(chunk, dtype=float).reshape(-1, 2)
+        for start in range(0, len(chunk), size):
+            yield chunk[start:start + size]
+
+def parameterValues(parameters):
+    # Convert the parameters to python numbers so they can be saved
+    return {key: numpy.asarray(value).item()
+            for key, value in parameters.items()}
+
+def parseValue(text):
+    # Convert a parameter read from a text file back to a number
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+def writeCsv(fileName, points, parameters, size=chunkSize):
+    # Write the points to a csv file
+    # Each chunk is formatted with a single string operation, which is much
+    # faster than numpy.savetxt as that formats the rows one at a time
+    count = 0
+    with open(fileName, "w") as f:
+        for key, value in parameterValues(parameters).items():
+            f.write("# {},{!r}\n".format(key, value))
+        f.write("x,y\n")
+
+        for chunk in pointChunks(points, size):
+            f.write(("%r,%r\n" * len(chunk)) % tuple(chunk.ravel().tolist()))
+            count += len(chunk)
+
+    return count
+
+def readCsvHeader(f):
+    # Read the parameters from the comment lines at the start of a csv file
+    # The file is left at the first row of points
+    parameters = {}
+    for line in f:
+        line = line.strip()
+        if line.startswith("#"):
+            key, value = line[1:].strip().split(",", 1)
+            parameters[key] = parseValue(value)
+        elif line == "x,y":
+            break
+    return parameters
+
+def readCsv(fileName):
+    with open(fileName) as f:
+        parameters = readCsvHeader(f)
+        # numpy warns if a gear has no points
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)
+            points = numpy.loadtxt(f, delimiter=",", ndmin=2)
+
+    return points.reshape(-1, 2), parameters
+
+def writeXlsx(fileName, points, parameters, size=chunkSize):
+    # Write the points to an xlsx workbook
+    # In write only mode openpyxl writes each row to a temporary file as it
+    # is added instead of keeping every cell in memory
+    import openpyxl
+
+    workbook = openpyxl.Workbook(write_only=True)
+    sheets = [workbook.create_sheet("Points")]
+    parametersSheet = workbook.create_sheet("Parameters")
+
+    count = 0
+    for chunk in pointChunks(points, size):
+        for row in chunk.tolist():
+            if count == len(sheets) * xlsxRows:
+                sheets.append(workbook.create_sheet(
+                    "Points {}".format(len(sheets) + 1)))
+            sheets[-1].append(row)
+            count += 1
+
+    for key, value in parameterValues(parameters).items():
+        parametersSheet.append([key, value])
+
+    workbook.save(fileName)
+
+    return count
+
+def xlsxParameters(workbook):
+    return {row[0]: row[1] for row in
+            workbook["Parameters"].iter_rows(max_col=2, values_only=True)
+            if row[0] != None}
+
+def readXlsx(fileName):
+    # Read the points from an xlsx workbook
+    # The rows are streamed straight into arrays in read only mode
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(fileName, read_only=True)
+    try:
+        chunks = []
+        for sheet in workbook.worksheets:
+            if sheet.title == "Points" or sheet.title.startswith("Points "):
+                values = numpy.fromiter(
+                    (value for row in sheet.iter_rows(max_col=2,
+                                                      values_only=True)
+                     for value in row), dtype=float)
+                chunks.append(values.reshape(-1, 2))
+        parameters = xlsxParameters(workbook)
+    finally:
+        workbook.close()
+
+    if len(chunks) == 0:
+        return numpy.empty((0, 2)), parameters
+    return numpy.concatenate(chunks), parameters
+
+def writeParquet(fileName, points, parameters, size=chunkSize):
+    # Write the points to a parquet file with the x and y values in columns
+    # Each chunk is written as a row group as soon as it is given
+    import pyarrow
+    import pyarrow.parquet
+
+    schema = pyarrow.schema(
+        [("x", pyarrow.float64()), ("y", pyarrow.float64())],
+        metadata={"parameters": json.dumps(parameterValues(parameters))})
+
+    count = 0
+    with pyarrow.parquet.ParquetWriter(fileName, schema) as writer:
+        for chunk in pointChunks(points, size):
+            writer.write_table(pyarrow.table(
+                {"x": numpy.ascontiguousarray(chunk[:, 0]),
+                 "y": numpy.ascontiguousarray(chunk[:, 1])}, schema=schema))
+            count += len(chunk)
+
+    return count
+
+def readParquet(fileName):
+    import pyarrow.parquet
+
+    table = pyarrow.parquet.read_table(fileName)
+    points = numpy.column_stack((table.column("x").to_numpy(),
+                                 table.column("y").to_numpy()))
+    parameters = json.loads(table.schema.metadata[b"parameters"])
+
+    return points, parameters
+
+def writeProfile(fileName, points, parameters, size=chunkSize):
+    # Write a profile in the format given by the extension of the file name
+    # Returns the number of points written
+    extension = os.path.splitext(fileName)[1].lower()
+    checkModule(extension)
+    if extension == ".csv":
+        return writeCsv(fileName, points, parameters, size)
+    elif extension == ".xlsx":
+        return writeXlsx(fileName, points, parameters, size)
+    elif extension == ".parquet":
+        return writeParquet(fileName, points, parameters, size)
+    raise ValueError("Unknown file type {}".format(extension))
+
+def readProfile(fileName):
+    # Read a profile in the format given by the extension of the file name
+    extension = os.path.splitext(fileName)[1].lower()
+    checkModule(extension)
+    if extension == ".csv":
+        return readCsv(fileName)
+    elif extension == ".xlsx":
+        return readXlsx(fileName)
+    elif extension == ".parquet":
+        return readParquet(fileName)
+    raise ValueError("Unknown file type {}".format(extension))
+
+def readProfileParameters(fileName):
+    # Read only the parameters of a profile
+    extension = os.path.splitext(fileName)[1].lower()
+    checkModule(extension)
+    if extension == ".csv":
+        with open(fileName) as f:
+            return readCsvHeader(f)
+    elif extension == ".xlsx":
+        import openpyxl
+        workbook = openpyxl.load_workbook(fileName, read_only=True)
+        try:
+            return xlsxParameters(workbook)
+        finally:
+            workbook.close()
+    elif extension == ".parquet":
+        import pyarrow.parquet
+        schema = pyarrow.parquet.read_schema(fileName)
+        return json.loads(schema.metadata[b"parameters"])
+    raise ValueError("Unknown file type {}".format(extension))
+
+# If this program is being run directly this code will be executed
+# If this program is being imported this code will not be executed
+if __name__ == "__main__":
+    print("This module is intended to be imported and not run directly.")
@@ -0,0 +1,140 @@
+# Import required modules
+
+# This module runs slow work such as reading files and generating gears on
+# background threads so that a tkinter window does not freeze
+# tkinter can only be used from the main thread, so the results are passed
+# back by checking the running tasks with the after method of a widget and
+# calling the callbacks from there
+
+# concurrent.futures provides the pool of worker threads
+from concurrent.futures import ThreadPoolExecutor
+import traceback
+
+class Task(object):
+    # A piece of work which has been given to the worker threads
+
+    def __init__(self, name, future, done, error):
+        self.name = name
+        self.future = future
+        self.done = done
+        self.error = error
+        self.cancelled = False
+
+    def cancel(self):
+        # The task is stopped if it has not started yet, otherwise it is
+        # left to finish and its result is thrown away
+        self.cancelled = True
+        self.future.cancel()
+
+class TaskRunner(object):
+    # Runs functions on worker threads and calls their callbacks on the
+    # thread of a tkinter widget
+    # Each task has a name and starting a task replaces any task which is
+    # still running with the same name, so only the result of the latest
+    # request is used
+
+    def __init__(self, widget, workers=2, interval=50, busy=None):
+        # widget is used to schedule the checks of the running tasks
+        # interval is the time between the checks in milliseconds
+        # busy is called with True when the first task starts and with False
+        # when the last task finishes or is cancelled
+        self.widget = widget
+        self.interval = interval
+        self.busy = busy
+
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.tasks = {}
+        self.polling = None
+
+    def submit(self, name, function, *args, done=None, error=None, **kwargs):
+        # Start a function on a worker thread
+        # done is called with the result and error with the exception and its
+        # traceback, both on the thread of the widget
+        busy = len(self.tasks) != 0
+        if name in self.tasks:
+            self.tasks.pop(name).cancel()
+
+        future = self.executor.submit(function, *args, **kwargs)
+        task = Task(name, future, done, error)
+        self.tasks[name] = task
+
+        if not busy and self.busy != None:
+            self.busy(True)
+        if self.polling is None:
+            self.polling = self.widget.after(self.interval, self.poll)
+
+        return task
+
+    def running(self, name=None):
+        # Check if any task, or the task with a name, is running
+        if name is None:
+            return len(self.tasks) != 0
+        return name in self.tasks
+
+    def poll(self):
+        # Call the callbacks of the tasks which have finished
+        self.polling = None
+
+        try:
+            for name, task in list(self.tasks.items()):
+                if not task.future.done():
+                    continue
+
+                del self.tasks[name]
+                if task.cancelled or task.future.cancelled():
+                    continue
+
+                # An error in a callback is printed so that the other tasks
+                # are still delivered
+                try:
+                    self.deliver(task)
+                except Exception:
+                    traceback.print_exc()
+        finally:
+            # A callback may have started another task which is already
+            # polling
+            if len(self.tasks) != 0:
+                if self.polling is None:
+                    self.polling = self.widget.after(self.interval, self.poll)
+            elif self.busy != None:
+                self.busy(False)
+
+    def deliver(self, task):
+        # Call the callback of a finished task with its result or error
+        exception = task.future.exception()
+        if exception is None:
+            if task.done != None:
+                task.done(task.future.result())
+        elif task.error != None:
+            task.error(exception, "".join(traceback.format_exception(
+                type(exception), exception, exception.__traceback__)))
+        else:
+            traceback.print_exception(type(exception), exception,
+                                      exception.__traceback__)
+
+    def cancel(self, name=None):
+        # Cancel a task, or every task if no name is given
+        if name is None:
+            names = list(self.tasks.keys())
+        else:
+            names = [name]
+
+        for name in names:
+            if name in self.tasks:
+                self.tasks.pop(name).cancel()
+
+        if len(self.tasks) == 0 and self.polling != None:
+            self.widget.after_cancel(self.polling)
+            self.polling = None
+            if self.busy != None:
+                self.busy(False)
+
+    def shutdown(self):
+        # Cancel every task and stop the worker threads
+        self.cancel()
+        self.executor.shutdown(wait=False)
+
+# If this program is being run directly this code will be executed
+# If this program is being imported this code will not be executed
+if __name__ == "__main__":
+    print("This module is intended to be imported and not run directly.")
@@ -0,0 +1,181 @@
+# Import required modules
+
+# This module exports the outlines of gears as SVG images and PDF documents
+# The paths are written straight from the arrays of points with one string
+# operation per file, so it is much faster than drawing a matplotlib figure
+# for every gear and the outlines stay sharp at any size
+# The drawings are full size, with 1 mm in the file being 1 mm of the gear
+
+# This imports the core functions for working with gears
+# We do not have to import numpy etc. as this is done in gearCore
+from gearCore import *
+import itertools
+import traceback
+import zlib
+import sys
+
+# The formats which can be exported
+vectorFormats = (".svg", ".pdf")
+
+# The number of PDF points in a mm
+pdfScale = 72 / 25.4
+
+def crossSize(parameters):
+    # Half the length of the lines of the centre cross, which is the same as
+    # the cross drawn by GearGUI.exportImage
+    return min(parameters["r_f"], parameters["r_b"]) / 4
+
+def pathText(points, move, line, close):
+    # Format the points as a path with a single string operation
+    # move and line are the formats of the first and the other points
+    points = numpy.asarray(points, dtype=float).reshape(-1, 2)
+    if len(points) == 0:
+        return ""
+
+    return ((move + line * (len(points) - 1)) % tuple(points.ravel().tolist())
+            + close)
+
+def svgText(points, parameters, linewidth=1, cross=True):
+    # The text of an SVG image of a gear
+    # The linewidth is in points like matplotlib and the y axis is reversed
+    # as y increases down the page in an SVG image
+    r = parameters["r_a"]
+    size = 2 * r
+    width = linewidth / pdfScale
+    points = numpy.asarray(points, dtype=float).reshape(-1, 2) * (1, -1)
+
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+             '<svg xmlns="http://www.w3.org/2000/svg" width="{0!r}mm" '
+             'height="{0!r}mm" viewBox="{1!r} {1!r} {0!r} {0!r}">'
+             .format(size, -r),
+             '<g fill="none" stroke="black" stroke-width="{!r}" '
+             'stroke-linejoin="round">'.format(width),
+             '<path d="{}"/>'.format(pathText(points, "M%.4f %.4f",
+                                              "L%.4f %.4f", "Z"))]
+    if cross:
+        R = crossSize(parameters)
+        lines.append('<path d="M0 {0!r}V{1!r}M{0!r} 0H{1!r}"/>'
+                     .format(-R, R))
+    lines += ["</g>", "</svg>"]
+
+    return "\n".join(lines) + "\n"
+
+def pdfBytes(points, parameters, linewidth=1, cross=True):
+    # The contents of a single page PDF document of a gear
+    # The page is the size of the tip circle and the drawing is scaled from
+    # mm to PDF points by the transformation at the start of the page
+    r = parameters["r_a"]
+    size = 2 * r * pdfScale
+
+    content = ["{0!r} 0 0 {0!r} {1!r} {1!r} cm".format(pdfScale,
+                                                       r * pdfScale),
+               "{!r} w 1 j".format(linewidth / pdfScale),
+               pathText(points, "%.4f %.4f m\n", "%.4f %.4f l\n", "h S")]
+    if cross:
+        R = crossSize(parameters)
+        content.append("0 {0!r} m 0 {1!r} l {0!r} 0 m {1!r} 0 l S"
+                       .format(-R, R))
+    stream = zlib.compress("\n".join(content).encode("ascii"), 1)
+
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>",
+               b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+               "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {0!r} {0!r}] "
+               "/Contents 4 0 R >>".format(size).encode("ascii"),
+               "<< /Length {} /Filter /FlateDecode >>\nstream\n"
+               .format(len(stream)).encode("ascii")
+               + stream + b"\nendstream"]
+
+    # The cross reference table gives the position of each object
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += ("{} 0 obj\n".format(number).encode("ascii") + body
+                 + b"\nendobj\n")
+
+    table = len(data)
+    data += "xref\n0 {}\n0000000000 65535 f \n".format(
+        len(objects) + 1).encode("ascii")
+    for offset in offsets:
+        data += "{:010d} 00000 n \n".format(offset).encode("ascii")
+    data += ("trailer\n<< /Size {} /Root 1 0 R >>\nstartxref\n{}\n%%EOF\n"
+             .format(len(objects) + 1, table).encode("ascii"))
+
+    return data
+
+def writeVector(fileName, points, parameters, linewidth=1, cross=True):
+    # Export a gear in the format given by the extension of the file name
+    extension = os.path.splitext(fileName)[1].lower()
+    if extension == ".svg":
+        with open(fileName, "w") as f:
+            f.write(svgText(points, parameters, linewidth, cross))
+    elif extension == ".pdf":
+        with open(fileName, "wb") as f:
+            f.write(pdfBytes(points, parameters, linewidth, cross))
+    else:
+        raise ValueError("Unknown file type {}".format(extension))
+
+def exportItem(fileName, directory, extension=".svg", linewidth=1,
+               cross=True):
+    # Export a gear file to the directory with the same name
+    # This is run in the worker processes so any error is returned
+    try:
+        points, parameters = readData(fileName)
+        os.makedirs(directory, exist_ok=True)
+        output = os.path.join(directory, os.path.splitext(
+            os.path.basename(fileName))[0] + extension)
+        writeVector(output, points, parameters, linewidth, cross)
+
+        return (fileName, output, None)
+    except Exception:
+        return (fileName, None, traceback.format_exc())
+
+def printProgress(done, total):
+    # The default progress report
+    sys.stdout.write("\rExported {} of {} gears".format(done, total))
+    if done == total:
+        sys.stdout.write("\n")
+    sys.stdout.flush()
+
+def exportBatch(fileNames, directory, extension=".svg", linewidth=1,
+                cross=True, workers=None, progress=printProgress,
+                chunksize=16):
+    # Export many gear files across all of the cores of the computer
+    # Each process reads and writes its own files so only the names of the
+    # files are passed between the processes
+    # It returns a list of (file name, output file name, traceback)
+    from concurrent.futures import ProcessPoolExecutor
+
+    if extension not in vectorFormats:
+        raise ValueError("Unknown file type {}".format(extension))
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for result in executor.map(exportItem, fileNames,
+                                   itertools.repeat(directory),
+                                   itertools.repeat(extension),
+                                   itertools.repeat(linewidth),
+                                   itertools.repeat(cross),
+                                   chunksize=chunksize):
+            results.append(result)
+            if progress != None:
+                progress(len(results), len(fileNames))
+
+    return results
+
+def exportCatalog(output, directory=None, extension=".svg", workers=None,
+                  progress=printProgress, **kwargs):
+    # Export every gear in the catalog of a directory, or the gears which
+    # match the keyword arguments of GearCatalog.find (such as m=2)
+    import gearCatalog
+
+    with gearCatalog.openCatalog(directory) as catalog:
+        fileNames = [gear["path"] for gear in catalog.find(**kwargs)]
+
+    return exportBatch(fileNames, output, extension, workers=workers,
+                       progress=progress)
+
+# If this program is being run directly this code will be executed
+# If this program is being imported this code will not be executed
+if __name__ == "__main__":
+    print("This module is intended to be imported and not run directly.")
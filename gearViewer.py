@@ -3,6 +3,8 @@
 # This imports the core functions for working with gears
 # We do not have to import math etc. as this is done in gearCore
 from gearCore import *
+# gearCache keeps the gear files which have been opened in memory
+from gearCache import *
 
 # Import the frame containing a matplotlib graph
 from graph import *
@@ -19,10 +21,6 @@ from tkinter import messagebox
 
 # matplotlib is the module to generate the graphs
 import matplotlib
-import matplotlib.style
-
-# pickle is used to save the options data
-import pickle
 
 # Change the default directory for saving figures
 matplotlib.rcParams["savefig.directory"] = os.getcwd() + "\\images"
@@ -66,6 +64,11 @@ class GraphFrame(Graph):
         self.axis.set_position([box.x0, box.y0 + box.height * 0.1,
                                 box.width, box.height * 0.9])
 
+        # The files which have been opened are cached so that redrawing the
+        # graph (when the window is resized or a line is shown or hidden)
+        # does not read them again
+        self.documents = DocumentCache()
+
         # Store the file names for later use
         self.fileNames = [fileName]
 
@@ -79,29 +82,26 @@ class GraphFrame(Graph):
 
         try:
             if len(fileNames) > 1:
-                # Load the gear data from the xls files
-                points1, parameters1 = readData(fileNames[0])
-                points2, parameters2 = readData(fileNames[1])
+                # Load the parameters first as the points are not needed
+                # unless the gears are compatible
+                parameters1 = self.documents.parameters(fileNames[0])
+                parameters2 = self.documents.parameters(fileNames[1])
 
                 if (parameters1["alpha"] == parameters2["alpha"]
                     and parameters1["m"] == parameters2["m"]):
-                    # Convert the points to a list of x and y values
-                    x1, y1 = zip(*points1)
-                    x2, y2 = zip(*points2)
+                    # Load the points and convert them to arrays of x and y
+                    # values
+                    points1 = self.documents.read(fileNames[0])[0]
+                    points2 = self.documents.read(fileNames[1])[0]
+                    x1, y1 = numpy.asarray(points1, dtype=float).T
+                    x2, y2 = numpy.asarray(points2, dtype=float).T
 
                     # Rotate the second gear
-                    x2, y2 = rotatePointList(x2, y2, parameters2["angle"] / 2,
-                                             (0, 0))
-
-                    # Convert the x and y values to lists
-                    x1, y1 = list(x1), list(y1)
-                    x2, y2 = list(x2), list(y2)
+                    x2, y2 = rotateArrays(x2, y2, parameters2["angle"] / 2)
 
                     # Adjust the x values so the gears don't overlap
-                    for i in range(len(x1)):
-                        x1[i] = x1[i] - parameters1["r"]
-                    for i in range(len(x2)):
-                        x2[i] = x2[i] + parameters2["r"]
+                    x1 = x1 - parameters1["r"]
+                    x2 = x2 + parameters2["r"]
 
                     # Plot the points by invoking the GraphFrame plot function
                     self.plot(x1, y1)
@@ -182,11 +182,11 @@ In order 2 for gears to mesh they must have the same module and pressure angle."
                 # Select the first item in the list of file names
                 fileName = fileNames[0]
 
-                # Load the gear data from the xls file
-                points, parameters = readData(fileName)
+                # Load the gear data from the file
+                points, parameters = self.documents.read(fileName)
 
-                # Convert the points into a list of x and y values
-                x, y = zip(*points)
+                # Convert the points into arrays of x and y values
+                x, y = numpy.asarray(points, dtype=float).T
 
                 # Plot the points by invoking the GraphFrame plot function
                 self.plot(x, y)
@@ -268,16 +268,11 @@ The gear cannot be opened because it is already open in another program.""")
         self.axis.set_title(text)
 
     def addCircle(self, r, style=None, centre=(0, 0)):
-        # Generate the list of points on the circle of radius r
-        x, y = circlePoints(r, 0.01)
-
-        # Adjust the coordinates for non-zero centres
-        if centre[0] != 0:
-            for i in range(len(x)):
-                x[i] = x[i] + centre[0]
-        if centre[1] != 0:
-            for i in range(len(y)):
-                y[i] = y[i] + centre[1]
+        # Generate the array of points on the circle of radius r
+        # and adjust the coordinates for non-zero centres
+        points = circleArray(r, 0.01)
+        points += centre
+        x, y = points[:, 0], points[:, 1]
 
         # Set the default style to a red line
         if style == None:
@@ -344,7 +339,8 @@ class MenuBar(tk.Menu):
             # Ask the user to select the xls files to open
             fileNames = askopenfilenames(initialdir="data",
                                          filetypes=[("Excel 97-2003 Workbook",
-                                                     "*.xls")],
+                                                     "*.xls"),
+                                                    ("Gear File", "*.gear")],
                                          defaultextension=".xls")
 
             if len(fileNames) != 0:
@@ -359,7 +355,8 @@ class MenuBar(tk.Menu):
             # Ask the user to select the xls file(s) to open
             fileName = askopenfilename(initialdir="data",
                                          filetypes=[("Excel 97-2003 Workbook",
-                                                     "*.xls")],
+                                                     "*.xls"),
+                                                    ("Gear File", "*.gear")],
                                          defaultextension=".xls")
 
             if fileName != "":
@@ -0,0 +1,127 @@
+# Import required modules
+
+# This program measures how long each of the gear modules takes to import
+# using "python -X importtime" and checks it against a budget, so that a slow
+# dependency which is imported too early is noticed
+# It only uses the standard library so it does not affect the measurements
+import argparse
+import subprocess
+import sys
+import os
+
+# The largest import time in milliseconds for each entry point on top of the
+# time to import numpy, which every module imports and which takes most of
+# the time of the headless modules, so the budgets do not depend on how fast
+# the computer imports numpy
+# The window programs are mostly the cost of importing tkinter and matplotlib
+budgets = {"gearCore": 50,
+           "gearProfile": 100,
+           "gearCache": 100,
+           "gearBatch": 100,
+           "gearCli": 150,
+           "contactRatio": 100,
+           "gearModel": 100,
+           "gearViewer": 1500,
+           "gearProgram": 2000}
+
+# Modules which must not be imported by the headless entry points as they are
+# slow to import and are only needed by some features
+heavyModules = ("xlrd", "xlwt", "tkinter", "matplotlib", "vpython", "PIL")
+headless = ("gearCore", "gearProfile", "gearCache", "gearBatch", "gearCli",
+            "contactRatio", "gearModel")
+
+def importTime(module):
+    # Import a module in a new python process and return the total time in
+    # milliseconds and the names of all of the modules it imported
+    # None is returned if the module could not be imported
+    directory = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c",
+                             "import " + module],
+                            cwd=directory, stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE, universal_newlines=True)
+    if result.returncode != 0:
+        return None, []
+
+    # Each line is "import time: self [us] | cumulative | imported package"
+    total = None
+    imported = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        columns = line[len("import time:"):].split("|")
+        if len(columns) != 3 or not columns[1].strip().isdigit():
+            continue
+        name = columns[2].strip()
+        imported.append(name)
+        if name == module and columns[2].rstrip() == " " + module:
+            total = int(columns[1]) / 1000
+
+    return total, imported
+
+def measure(module, repeat=5):
+    # The fastest of several imports is used as the others are slowed down
+    # by things such as the disk cache
+    times = []
+    imported = []
+    for i in range(repeat):
+        total, imported = importTime(module)
+        if total is None:
+            return None, []
+        times.append(total)
+
+    return min(times), imported
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="importTime", description="Check the import time of the gear "
+        "modules against their budgets.")
+    parser.add_argument("modules", nargs="*", default=list(budgets.keys()),
+                        help="the modules to measure (all of them by "
+                        "default)")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="the number of times to import each module")
+    arguments = parser.parse_args(argv)
+
+    # The budgets are added to the time to import numpy on this computer
+    baseline = measure("numpy", arguments.repeat)[0] or 0
+
+    failed = False
+    print("{:<14}{:>10}{:>10}  {}".format("module", "time (ms)", "budget",
+                                           "result"))
+    print("{:<14}{:>10.1f}{:>10}  {}".format("numpy", baseline, "-",
+                                              "baseline"))
+    for module in arguments.modules:
+        budget = budgets.get(module)
+        if budget != None:
+            budget = baseline + budget
+        total, imported = measure(module, arguments.repeat)
+
+        if total is None:
+            # The dependencies of the module are not installed
+            print("{:<14}{:>10}{:>10}  {}".format(
+                module, "-", "-" if budget is None else "{:.1f}".format(budget),
+                "unavailable"))
+            continue
+
+        result = "ok"
+        if budget != None and total > budget:
+            result = "over budget"
+        if module in headless:
+            heavy = sorted(set(name for name in imported
+                               if name.split(".")[0] in heavyModules))
+            if len(heavy) != 0:
+                result = "imports {}".format(", ".join(heavy))
+
+        if result != "ok":
+            failed = True
+
+        print("{:<14}{:>10.1f}{:>10}  {}".format(
+            module, total, "-" if budget is None else "{:.1f}".format(budget),
+            result))
+
+    return int(failed)
+
+# If this program is being run directly this code will be executed
+# If this program is being imported this code will not be executed
+if __name__ == "__main__":
+    sys.exit(main())